@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Awaitable
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class ChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processes updates from different chats concurrently while keeping updates
+    from the same chat strictly in order.
+    A slow handler (e.g. an LLM call) in one chat no longer blocks other chats,
+    and conversation states are still resolved one update at a time per chat.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._chat_locks: dict[int, list] = {}  # chat_id -> [lock, updates using it in arrival order]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """
+        Runs the update coroutine while holding the lock of the update's chat.
+
+        Args:
+            update (object): The update to process.
+            coroutine (Awaitable[Any]): The coroutine that processes the update.
+        """
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            await coroutine
+            return
+
+        entry = self._chat_locks.setdefault(chat.id, [asyncio.Lock(), []])
+        entry[1].append(update)
+        try:
+            async with entry[0]:
+                await coroutine
+        finally:
+            entry[1].remove(update)
+            if not entry[1]:
+                self._chat_locks.pop(chat.id, None)
+
+    def pending_updates(self, chat_id: int) -> list[Update]:
+        """
+        Returns the updates of the chat queued behind the one being processed.
+
+        Args:
+            chat_id (int): The ID of the chat.
+
+        Returns:
+            list[Update]: The updates waiting for the chat's lock, in arrival order.
+        """
+        entry = self._chat_locks.get(chat_id)
+        return entry[1][1:] if entry else []
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        self._chat_locks.clear()
@@ -1,20 +1,54 @@
 import telegram
 from telegram import Update, User, BotCommand
-from telegram.ext import Application, ApplicationBuilder, CallbackContext, CommandHandler, MessageHandler, filters, ContextTypes, ConversationHandler
-from telegram.constants import ParseMode 
+from telegram.ext import Application, ApplicationBuilder, CallbackContext, CallbackQueryHandler, CommandHandler, MessageHandler, filters, ContextTypes, ConversationHandler
+from telegram.constants import ParseMode, ChatAction
+from telegram.warnings import PTBUserWarning
+import asyncio
 import logging
-import db.mongodb_service as db
-from helpers.configurator import Config
+import warnings
+from cachetools import LRUCache
+from db.mongodb_service import Database
+from helpers.configurator import get_config
 from llmservices.google_service import GoogleService
 from clients.backend_api_client import BackendApiClient
+from bot.chat_update_processor import ChatUpdateProcessor
 from handlers.create_step_handler import CreateStepHandler
 from handlers.view_handler import ViewHandler
 from handlers.edit_handler import EditHandler
 from handlers.delete_handler import DeleteHandler
 
 # Configure logging
-db = db.Database()
 logger = logging.getLogger(__name__)
+
+TEXT_NOT_COMMAND = filters.TEXT & ~filters.COMMAND
+
+# Commands shown in the Telegram client's command menu
+BOT_COMMANDS = [
+    BotCommand("start", "Начать"),
+    BotCommand("new_appointment", "Новая запись"),
+    BotCommand("cancel", "Отмена"),
+    BotCommand("gettest", "Мой UUID"),
+]
+
+# Message coalescing: short messages are usually followed by more, so wait less for them
+SHORT_MESSAGE_LENGTH = 40
+SHORT_MESSAGE_FLUSH_DELAY = 0.18
+LONG_MESSAGE_FLUSH_DELAY = 0.6
+PENDING_MESSAGE_MAX_AGE = 10.0
+
+# Выбор клиники идёт inline-кнопками, остальные шаги диалога - обычными сообщениями, поэтому диалог
+# отслеживается по чату (per_message=False). Кнопки прошлых списков клиник закрываются явно
+# (CreateStepHandler._close_clinic_keyboard / expire_clinic_keyboard), так что предупреждение PTB не актуально.
+warnings.filterwarnings("ignore", message="If 'per_message=False'", category=PTBUserWarning)
+
+
+def _is_plain_text(update: Update) -> bool:
+    """
+    Tells whether the update is a text message (not a command) that default_response will receive.
+    """
+    return bool(TEXT_NOT_COMMAND.check_update(update))
+
+
 class TelegramBotInitializer:
     """
     A class to initialize a Telegram bot with the provided token.
@@ -33,62 +67,110 @@ class TelegramBotInitializer:
         self.edit_handler_instance = EditHandler()
         self.delete_handler_instance = DeleteHandler()
         self.conv_handler_create: ConversationHandler | None = None
-        self.bot = self.initialize_telegram_bot()
-        
+        self.application: Application | None = None
+        self._known_users = LRUCache(maxsize=10000)  # user ids already known to be registered
+
 
     def initialize_telegram_bot(self) -> None:
         """
-        Initializes the Telegram bot with the provided token.
-
-        Args:
-            token (str): The bot token provided by BotFather.
-
-        Returns:
-            telegram.Bot: An instance of the Telegram Bot.
+        Builds the Telegram application and registers all handlers.
+        Does not start receiving updates, see run().
         """
         try:
             self.application = (
                 ApplicationBuilder()
-                .token(Config().get("TELEGRAM", "token"))
-                .http_version("1.1")
+                .token(get_config().get("TELEGRAM", "token"))
+                .http_version("2")
+                .concurrent_updates(ChatUpdateProcessor(256))
                 .build()
             )
-            
+            self.application.bot_data["llm"] = GoogleService()
 
             self.conv_handler_create = ConversationHandler(
             entry_points=[CommandHandler("new_appointment", self.step_handler_instance.start_appointment_creation),
-                          MessageHandler(filters.TEXT & ~filters.COMMAND, self.default_response)
+                          MessageHandler(TEXT_NOT_COMMAND, self.default_response)
                           ],
             states={
-                CreateStepHandler.CHOOSE_CLINIC: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.step_handler_instance.process_clinic_choice)],
-                CreateStepHandler.CHOOSE_SPECIALIZATION: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.step_handler_instance.process_specialization_choice)],
-                CreateStepHandler.CHOOSE_DOCTOR: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.step_handler_instance.process_doctor_choice)],
-                CreateStepHandler.CHOOSE_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.step_handler_instance.process_date_choice)], # Обрабатывает дату и предлагает время
-                CreateStepHandler.CHOOSE_TIME: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.step_handler_instance.process_time_choice)],
-                CreateStepHandler.CONFIRMATION: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.step_handler_instance.process_confirmation)],
-                EditHandler.CHOOSE_APPOINTMENT: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.edit_handler_instance.choose_appointment)],
-                EditHandler.EDIT_APPOINTMENT_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.edit_handler_instance.choose_appointment_date)],
-                EditHandler.EDIT_APPOINTMENT_TIME: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.edit_handler_instance.choose_appointment_time)],
-                EditHandler.CONFIRMATION: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.edit_handler_instance.confirm_edit)],
-                DeleteHandler.CHOOSE_APPOINTMENT: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.delete_handler_instance.choose_appointment)],
-                DeleteHandler.CONFIRMATION: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.delete_handler_instance.confirm_delete)],
+                CreateStepHandler.CHOOSE_CLINIC: [CallbackQueryHandler(self.step_handler_instance.process_clinic_choice, pattern=r"^clinic:"),
+                                                  MessageHandler(TEXT_NOT_COMMAND, self.step_handler_instance.process_clinic_choice)],
+                CreateStepHandler.CHOOSE_SPECIALIZATION: [MessageHandler(TEXT_NOT_COMMAND, self.step_handler_instance.process_specialization_choice)],
+                CreateStepHandler.CHOOSE_DOCTOR: [MessageHandler(TEXT_NOT_COMMAND, self.step_handler_instance.process_doctor_choice)],
+                CreateStepHandler.CHOOSE_DATE: [MessageHandler(TEXT_NOT_COMMAND, self.step_handler_instance.process_date_choice)], # Обрабатывает дату и предлагает время
+                CreateStepHandler.CHOOSE_TIME: [MessageHandler(TEXT_NOT_COMMAND, self.step_handler_instance.process_time_choice)],
+                CreateStepHandler.CONFIRMATION: [MessageHandler(TEXT_NOT_COMMAND, self.step_handler_instance.process_confirmation)],
+                EditHandler.CHOOSE_APPOINTMENT: [MessageHandler(TEXT_NOT_COMMAND, self.edit_handler_instance.choose_appointment)],
+                EditHandler.EDIT_APPOINTMENT_DATE: [MessageHandler(TEXT_NOT_COMMAND, self.edit_handler_instance.choose_appointment_date)],
+                EditHandler.EDIT_APPOINTMENT_TIME: [MessageHandler(TEXT_NOT_COMMAND, self.edit_handler_instance.choose_appointment_time)],
+                EditHandler.CONFIRMATION: [MessageHandler(TEXT_NOT_COMMAND, self.edit_handler_instance.confirm_edit)],
+                DeleteHandler.CHOOSE_APPOINTMENT: [MessageHandler(TEXT_NOT_COMMAND, self.delete_handler_instance.choose_appointment)],
+                DeleteHandler.CONFIRMATION: [MessageHandler(TEXT_NOT_COMMAND, self.delete_handler_instance.confirm_delete)],
             },
             fallbacks=[CommandHandler("cancel", self.step_handler_instance.cancel)],
 
         )
 
             self.application.add_handler(self.conv_handler_create)
+            # Нажатия на списки клиник вне шага выбора клиники
+            self.application.add_handler(CallbackQueryHandler(self.step_handler_instance.expire_clinic_keyboard, pattern=r"^clinic:"))
             self.application.add_handler(CommandHandler("start", self.start_command))
             self.application.add_handler(CommandHandler("gettest", self.gettest_command))
-            
 
-            self.application.run_polling()
             logger.info("Telegram bot initialized successfully.")
             
         except Exception as e:
             logger.error(f"Failed to initialize Telegram bot: {e}")
             raise
-    
+
+    async def run(self) -> None:
+        """
+        Starts the bot and receives updates until the task is cancelled (e.g. Ctrl+C).
+        The shared database and backend clients are opened before polling starts and closed on exit.
+        """
+        self.initialize_telegram_bot()
+        db = Database()
+        try:
+            await db.ping()
+            await db.create_indexes()
+            self.application.bot_data["db"] = db
+            async with BackendApiClient() as api:
+                self.application.bot_data["api"] = api
+                async with self.application:
+                    await self.application.bot.set_my_commands(BOT_COMMANDS)
+                    await self.application.start()
+                    await self.start_receiving_updates()
+                    try:
+                        await asyncio.Event().wait()
+                    finally:
+                        await self.application.updater.stop()
+                        await self.application.stop()
+        finally:
+            db.close()
+
+    async def start_receiving_updates(self) -> None:
+        """
+        Starts the updater in webhook mode if [TELEGRAM] webhook_url is configured,
+        otherwise falls back to long polling.
+        """
+        config = get_config()
+        allowed_updates = [Update.MESSAGE, Update.CALLBACK_QUERY]
+        webhook_url = config.get("TELEGRAM", "webhook_url", fallback=None)
+        if not webhook_url:
+            await self.application.updater.start_polling(allowed_updates=allowed_updates)
+            logger.info("Telegram bot started polling.")
+            return
+
+        url_path = config.get("TELEGRAM", "webhook_path", fallback="telegram")
+        await self.application.updater.start_webhook(
+            listen=config.get("TELEGRAM", "webhook_listen", fallback="0.0.0.0"),
+            port=int(config.get("TELEGRAM", "webhook_port", fallback="8443")),
+            url_path=url_path,
+            webhook_url=f"{webhook_url.rstrip('/')}/{url_path}",
+            secret_token=config.get("TELEGRAM", "webhook_secret", fallback=None),
+            max_connections=100,
+            allowed_updates=allowed_updates
+        )
+        logger.info(f"Telegram bot started webhook at {webhook_url}.")
+
     async def register_user_if_not_exists(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
         Registers a user in the database if they do not already exist.
@@ -98,17 +180,20 @@ class TelegramBotInitializer:
             context (ContextTypes.DEFAULT_TYPE): The context of the command.
         """
         user: User = update.effective_user
-        if not db.check_if_user_exists(user.id):
-            db.add_user(
-                user_id=user.id,
-                chat_id=update.effective_chat.id,
-                username=user.username or "",
-                first_name=user.first_name or "",
-                last_name=user.last_name or ""
-            )
+        if user.id in self._known_users:
+            return
+        registered = await context.application.bot_data["db"].add_user(
+            user_id=user.id,
+            chat_id=update.effective_chat.id,
+            username=user.username or "",
+            first_name=user.first_name or "",
+            last_name=user.last_name or ""
+        )
+        if registered:
             logger.info(f"User {user.username} registered successfully.")
         else:
             logger.info(f"User {user.username} already exists in the database.")
+        self._known_users[user.id] = True
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
@@ -124,6 +209,37 @@ class TelegramBotInitializer:
             parse_mode=ParseMode.HTML
         )
     
+    async def coalesce_messages(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> str | None:
+        """
+        Buffers the user's message and briefly waits for follow-up messages,
+        so a burst like "к кардиологу", "завтра", "утром" results in a single LLM request.
+
+        Args:
+            update (Update): The update containing the message from the user.
+            context (ContextTypes.DEFAULT_TYPE): The context of the command.
+
+        Returns:
+            str | None: The joined text of the burst, or None if a newer text message of the chat will handle it.
+        """
+        text = update.message.text
+        now = asyncio.get_running_loop().time()
+        pending = context.chat_data.setdefault("pending_messages", [])
+        pending.append((now, text))
+
+        chat_id = update.effective_chat.id
+        processor = context.application.update_processor
+        queued = processor.pending_updates(chat_id)
+        if not queued:
+            delay = SHORT_MESSAGE_FLUSH_DELAY if len(text) <= SHORT_MESSAGE_LENGTH else LONG_MESSAGE_FLUSH_DELAY
+            await asyncio.sleep(delay)
+            queued = processor.pending_updates(chat_id)
+        # Буфер заберёт только следующее текстовое сообщение; команды и нажатия кнопок его не читают
+        if queued and all(_is_plain_text(queued_update) for queued_update in queued):
+            return None
+
+        context.chat_data["pending_messages"] = []
+        return "\n".join(message for received_at, message in pending if now - received_at <= PENDING_MESSAGE_MAX_AGE)
+
     async def default_response(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
         Handles any text message that does not match a command.
@@ -132,16 +248,27 @@ class TelegramBotInitializer:
             update (Update): The update containing the message from the user.
             context (ContextTypes.DEFAULT_TYPE): The context of the command.
         """
-        reply_msg = await GoogleService().generate_json_text(update.message.text)
-        await self.register_user_if_not_exists(update, context)
-        logger.info(f"Received message: {update.message.text}")
+        text = await self.coalesce_messages(update, context)
+        if text is None:
+            return
+
+        # Индикатор набора отправляется отдельно: его сбой не должен ломать ответ пользователю
+        context.application.create_task(
+            context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
+        )
+        reply_msg, _ = await asyncio.gather(
+            context.application.bot_data["llm"].generate_json_text(text),
+            self.register_user_if_not_exists(update, context)
+        )
+        logger.info(f"Received message: {text}")
         logger.info(f"Generated reply: {reply_msg}")
 
         if not reply_msg:
             await update.message.reply_text(
                 "Извините, я не смог понять ваш запрос. Пожалуйста, попробуйте переформулировать."
             )
-        
+            return
+
         if reply_msg.get("intent") == "unknown":
             await update.message.reply_text(
                 f"Не могу понять ваш запрос: {reply_msg.get('reason', 'Неизвестная ошибка')} Пожалуйста, попробуйте переформулировать."
@@ -178,7 +305,7 @@ class TelegramBotInitializer:
         """
 
         logger.info(f"handlers: {self.conv_handler_create.entry_points}")
-        uuid = db.get_user_uuid(update.effective_user.id)
+        uuid = await context.application.bot_data["db"].get_user_uuid(update.effective_user.id)
         await update.message.reply_text(
             f"Ваш UUID: <b>{uuid}</b>",
             parse_mode=ParseMode.HTML
@@ -1,18 +1,187 @@
-from aiohttp import ClientSession
+from aiohttp import ClientResponseError, ClientSession, ClientTimeout, TCPConnector
+from aiolimiter import AsyncLimiter
+from cachetools import TTLCache
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
-from typing import List, Dict, Union
+from typing import Any, Awaitable, Callable, List, Dict, Union
+import asyncio
 import logging
+import orjson
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 
 logger = logging.getLogger(__name__)
 
+# Cached doctor and specialization lookups may be filtered by free time slots, so appointment changes invalidate them
+AVAILABILITY_ENDPOINT = "DoctorCards"
+
+# Speculative prefetch shares the rate limiter with real user requests, so its fan-out is capped
+PREFETCH_MAX_CLINICS = 4
+
+
+def _is_overload_error(exc: BaseException) -> bool:
+    """
+    Tells whether the backend rejected a request because it is overloaded (429/503).
+    """
+    return isinstance(exc, ClientResponseError) and exc.status in (429, 503)
+
+
+# Retries requests the backend rejected as overloaded, backing off exponentially up to 30 s
+_retry_on_overload = retry(
+    retry=retry_if_exception(_is_overload_error),
+    wait=wait_exponential(multiplier=1, max=30),
+    stop=stop_after_attempt(5),
+    reraise=True
+)
+
+
+@lru_cache(maxsize=4096)
+def _title(value: str) -> str:
+    """
+    Title-cases a name coming from the API, memoized since the same names repeat across responses.
+    """
+    return value.title()
+
+
+@lru_cache(maxsize=64)
+def _transform_specializations(spec_names: tuple) -> List[Dict[str, Union[int, str]]]:
+    """
+    Turns the specialization names returned by the API into {"id", "name"} dicts.
+    Memoized on the raw names, so identical responses reuse the same list.
+    """
+    return [{"id": index, "name": _title(spec_name)} for index, spec_name in enumerate(spec_names)]
+
+
 class BackendApiClient:
-    def __init__(self):
+    def __init__(self, pool_size: int = 256, per_host: int = 64, max_concurrency: int = 32):
         """
         Initializes the Backend API client with the base URL.
+
+        Args:
+            pool_size (int): Maximum number of simultaneous connections.
+            per_host (int): Maximum number of simultaneous connections to the backend host.
+            max_concurrency (int): Maximum number of requests waiting for a backend response at once.
         """
         self.base_url = "http://localhost:5136/api/"
-        self.session = ClientSession()
+        self.pool_size = pool_size
+        self.per_host = per_host
+        self._session: Optional[ClientSession] = None
+        self._cache = TTLCache(maxsize=512, ttl=300)  # catalog data (clinics, doctors, specializations)
+        self._limiter = AsyncLimiter(max_rate=25, time_period=1.0)  # outgoing requests per second
+        self._concurrency = asyncio.Semaphore(max_concurrency)  # requests in flight, bounds gather() fan-outs
+        self._inflight: Dict[tuple, asyncio.Task] = {}  # GET requests currently on the wire
+        self._prefetching: set = set()  # clinic/filter combinations currently being prefetched
+
+    async def __aenter__(self) -> "BackendApiClient":
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _get_session(self) -> ClientSession:
+        """
+        Returns the shared HTTP session, creating it on first use.
+        The session (and its keep-alive connection pool) lives until close() is called.
+
+        Returns:
+            ClientSession: The shared aiohttp session.
+        """
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(
+                    limit=self.pool_size,
+                    limit_per_host=self.per_host,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=75,
+                    enable_cleanup_closed=True
+                ),
+                json_serialize=lambda obj: orjson.dumps(obj).decode(),
+                timeout=ClientTimeout(total=30)
+            )
+        return self._session
+
+    @staticmethod
+    def _request_key(endpoint: str, params: Optional[dict] = None) -> tuple:
+        """
+        Builds a hashable key identifying a GET request by its endpoint and query parameters.
+        """
+        return (endpoint, tuple(sorted((params or {}).items())))
+
+    async def _cached_get(self, endpoint: str, fetch: Callable[[], Awaitable[Any]], params: Optional[dict] = None) -> Any:
+        """
+        Returns the cached value for the endpoint and parameters, or awaits fetch() and caches its result.
+        Values are stored already transformed, so cache hits cost no extra processing.
+
+        Args:
+            endpoint (str): The API endpoint the value comes from.
+            fetch (Callable[[], Awaitable[Any]]): Coroutine function producing the value on a miss.
+            params (dict, optional): The query parameters of the request.
+
+        Returns:
+            Any: The cached or freshly fetched value.
+        """
+        key = self._request_key(endpoint, params)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        value = await fetch()
+        self._cache[key] = value
+        return value
+
+    def invalidate(self, prefix: str) -> None:
+        """
+        Drops cached values of all endpoints starting with the prefix.
+
+        Args:
+            prefix (str): The endpoint prefix, e.g. "DoctorCards/speciality".
+        """
+        for key in [key for key in self._cache.keys() if key[0].startswith(prefix)]:
+            self._cache.pop(key, None)
+
+    async def _request(self, method: str, endpoint: str, **kwargs) -> Union[dict, list, bool, None]:
+        """
+        Sends a request to the specified endpoint and returns the parsed JSON response.
+        All HTTP verbs go through here, so rate limiting and parsing live in one place.
+
+        Args:
+            method (str): The HTTP method.
+            endpoint (str): The API endpoint to send the request to.
+            **kwargs: Additional arguments for ClientSession.request (params, json).
+
+        Returns:
+            Union[dict, list, bool, None]: The JSON response from the API, True for 204 No Content,
+                or None for an empty body.
+        """
+        url = f"{self.base_url}{endpoint}"
+        session = await self._get_session()
+        async with self._concurrency, self._limiter, session.request(method, url, **kwargs) as response:
+            response.raise_for_status()
+            logger.info("%s %s with %s returned status %s", method, url, kwargs, response.status)
+            if response.status == 204:  # No Content
+                return True
+            body = await response.read()
+            # A 200 with an empty body (e.g. a bare Ok()) carries no JSON
+            if not body:
+                return None
+            return orjson.loads(body)
+
+    @_retry_on_overload
+    async def _get_with_retry(self, endpoint: str, params: Optional[dict]) -> Union[dict, list, bool, None]:
+        """
+        Sends a GET request, retrying it while the backend reports overload.
+        Only GETs are retried: a 503 after a write may come from a proxy once the backend
+        has already committed it, and repeating the write would duplicate it.
+
+        Args:
+            endpoint (str): The API endpoint to send the request to.
+            params (dict, optional): The query parameters to include in the GET request.
+
+        Returns:
+            Union[dict, list, bool, None]: The JSON response from the API.
+        """
+        return await self._request("GET", endpoint, params=params)
 
     async def post(self, endpoint: str, data: dict) -> dict:
         """
@@ -25,12 +194,7 @@ class BackendApiClient:
         Returns:
             dict: The JSON response from the API.
         """
-        url = f"{self.base_url}{endpoint}"
-        async with self.session.post(url, json=data) as response:
-            response.raise_for_status()
-            logger.info(f"POST {url} with data {data} returned status {response.status}")
-            await self.close()
-            return await response.json()
+        return await self._request("POST", endpoint, json=data)
     
     async def get(self, endpoint: str, params: dict = None) -> dict:
         """
@@ -43,12 +207,14 @@ class BackendApiClient:
         Returns:
             dict: The JSON response from the API.
         """
-        url = f"{self.base_url}{endpoint}"
-        async with self.session.get(url, params=params) as response:
-            response.raise_for_status()
-            logger.info(f"GET {url} with params {params} returned status {response.status}")
-            await self.close()
-            return await response.json()
+        key = self._request_key(endpoint, params)
+        task = self._inflight.get(key)
+        if task is None:
+            # Concurrent identical GETs share one request instead of each hitting the backend
+            task = asyncio.ensure_future(self._get_with_retry(endpoint, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
         
     async def put(self, endpoint: str, data: dict) -> dict:
         """
@@ -61,19 +227,7 @@ class BackendApiClient:
         Returns:
             dict: The JSON response from the API.
         """
-        url = f"{self.base_url}{endpoint}"
-        header = {
-            "Content-Type": "application/json"
-        }
-        async with self.session.put(url, json=data, headers=header) as response:
-
-            response.raise_for_status()
-            logger.info(f"PUT {url} with data {data} returned status {response.status}")
-            await self.close()
-            if response.status == 204:  # No Content
-                return response.ok
-            else:
-                return await response.json()
+        return await self._request("PUT", endpoint, json=data)
     
     async def delete(self, endpoint: str) -> dict:
         """
@@ -85,15 +239,7 @@ class BackendApiClient:
         Returns:
             dict: The JSON response from the API.
         """
-        url = f"{self.base_url}{endpoint}"
-        async with self.session.delete(url) as response:
-            response.raise_for_status()
-            logger.info(f"DELETE {url} returned status {response.status}")
-            await self.close()
-            if response.status == 204:  # No Content
-                return response.ok
-            else:
-                return await response.json()
+        return await self._request("DELETE", endpoint)
     
     async def get_clinic_card(self, clinic_id: int) -> dict:
         """
@@ -105,10 +251,14 @@ class BackendApiClient:
         Returns:
             dict: The JSON response containing the clinic cards.
         """
-        clinic = await self.get(f"ClinicCards/{clinic_id}")
-        clinic['name'] = clinic['name'].title()
-        clinic['location'] = clinic['location'].title()
-        return clinic
+        endpoint = f"ClinicCards/{clinic_id}"
+
+        async def fetch():
+            clinic = await self.get(endpoint)
+            clinic['name'] = _title(clinic['name'])
+            clinic['location'] = _title(clinic['location'])
+            return clinic
+        return await self._cached_get(endpoint, fetch)
     
     async def get_clinic_cards(self) -> dict:
         """
@@ -117,11 +267,13 @@ class BackendApiClient:
         Returns:
             dict: The JSON response containing the clinic cards.
         """
-        clinics = await self.get(f"ClinicCards/")
-        for clinic in clinics:
-            clinic['name'] = clinic['name'].title()
-            clinic['location'] = clinic['location'].title()
-        return clinics
+        async def fetch():
+            clinics = await self.get(f"ClinicCards/")
+            for clinic in clinics:
+                clinic['name'] = _title(clinic['name'])
+                clinic['location'] = _title(clinic['location'])
+            return clinics
+        return await self._cached_get("ClinicCards/", fetch)
     
     async def get_doctor_cards(self) -> dict:
         """
@@ -130,11 +282,13 @@ class BackendApiClient:
         Returns:
             dict: The JSON response containing the doctor cards.
         """
-        doctors = await self.get(f"DoctorCards/")
-        for doctor in doctors:
-            doctor['name'] = doctor['name'].title()
-            doctor['speciality'] = doctor['speciality'].title()
-        return doctors
+        async def fetch():
+            doctors = await self.get(f"DoctorCards/")
+            for doctor in doctors:
+                doctor['name'] = _title(doctor['name'])
+                doctor['speciality'] = _title(doctor['speciality'])
+            return doctors
+        return await self._cached_get("DoctorCards/", fetch)
     
     async def get_doctor_card(self, doctor_id: int) -> dict:
         """
@@ -146,30 +300,89 @@ class BackendApiClient:
         Returns:
             dict: The JSON response containing the doctor card.
         """
-        doctor = await self.get(f"DoctorCards/{doctor_id}")
-        doctor['name'] = doctor['name'].title()
-        doctor['speciality'] = doctor['speciality'].title()
-        return doctor
+        endpoint = f"DoctorCards/{doctor_id}"
+
+        async def fetch():
+            doctor = await self.get(endpoint)
+            doctor['name'] = _title(doctor['name'])
+            doctor['speciality'] = _title(doctor['speciality'])
+            return doctor
+        return await self._cached_get(endpoint, fetch)
     
-    async def get_doctor_working_hours(self, doctor_id: int, date: datetime) -> dict:
+    async def get_doctor_cards_by_ids(self, doctor_ids: List[int]) -> Dict[int, dict]:
+        """
+        Retrieves the cards of several doctors at once.
+        Cards are taken from the list of all doctors when it is already cached; the rest are
+        fetched concurrently through the cached per-ID lookup. The full list is never downloaded here.
+
+        Args:
+            doctor_ids (List[int]): The IDs of the doctors, duplicates are allowed.
+
+        Returns:
+            Dict[int, dict]: The doctor cards keyed by doctor ID.
+        """
+        if not doctor_ids:
+            return {}
+        doctors = {doctor["doctorId"]: doctor for doctor in self._cache.get(self._request_key("DoctorCards/"), ())}
+        return await self._collect_cards(doctor_ids, doctors, self.get_doctor_card)
+
+    async def get_clinic_cards_by_ids(self, clinic_ids: List[int]) -> Dict[int, dict]:
+        """
+        Retrieves the cards of several clinics at once.
+        Cards are taken from the list of all clinics when it is already cached; the rest are
+        fetched concurrently through the cached per-ID lookup. The full list is never downloaded here.
+
+        Args:
+            clinic_ids (List[int]): The IDs of the clinics, duplicates are allowed.
+
+        Returns:
+            Dict[int, dict]: The clinic cards keyed by clinic ID.
+        """
+        if not clinic_ids:
+            return {}
+        clinics = {clinic["clinicId"]: clinic for clinic in self._cache.get(self._request_key("ClinicCards/"), ())}
+        return await self._collect_cards(clinic_ids, clinics, self.get_clinic_card)
+
+    @staticmethod
+    async def _collect_cards(
+        ids: List[int],
+        known: Dict[int, dict],
+        fetch_one: Callable[[int], Awaitable[dict]]
+    ) -> Dict[int, dict]:
+        """
+        Picks the requested cards from an already loaded index and fetches the missing ones concurrently.
+
+        Args:
+            ids (List[int]): The requested IDs.
+            known (Dict[int, dict]): Cards that are already loaded, keyed by ID.
+            fetch_one (Callable[[int], Awaitable[dict]]): Fetches a single card by ID.
+
+        Returns:
+            Dict[int, dict]: The requested cards keyed by ID.
+        """
+        unique_ids = list(dict.fromkeys(ids))
+        missing = [card_id for card_id in unique_ids if card_id not in known]
+        if missing:
+            known = {**known, **dict(zip(missing, await asyncio.gather(*(fetch_one(card_id) for card_id in missing))))}
+        return {card_id: known[card_id] for card_id in unique_ids}
+
+    async def get_doctor_working_hours(self, doctor_id: int, date: Union[str, datetime]) -> List[str]:
         """
         Retrieves the working hours of a doctor for a specific date.
 
         Args:
             doctor_id (int): The ID of the doctor.
-            date (datetime): The date for which to retrieve the working hours.
+            date (Union[str, datetime]): The date (or "YYYY-MM-DD" string) for which to retrieve the working hours.
 
         Returns:
-            dict: The JSON response containing the doctor's working hours.
+            List[str]: The available time slots in "HH:MM" format, empty if the API returned no list.
         """
+        if not isinstance(date, str):
+            date = date.strftime("%Y-%m-%d")
         api_response = await self.get(f"DoctorCards/{doctor_id}/timeslots/{date}")
-        if isinstance(api_response, list):
-            formatted_hours = [
-                time_str[:5]
-                for time_str in api_response 
-                if isinstance(time_str, str) and len(time_str) >= 5
-            ]
-        return formatted_hours
+        if not isinstance(api_response, list):
+            return []
+        return [time_str[:5] for time_str in api_response if isinstance(time_str, str) and len(time_str) >= 5]
     
     async def get_doctor_containting_name(self, name: str) -> dict:
         """
@@ -229,7 +442,9 @@ class BackendApiClient:
         Returns:
             dict: The JSON response containing the created appointment details.
         """
-        return await self.post("Appointment", data)
+        response = await self.post("Appointment", data)
+        self.invalidate(AVAILABILITY_ENDPOINT)
+        return response
     
     async def put_appointment(self, appointment_id: int, data: dict) -> dict:
         """
@@ -242,7 +457,9 @@ class BackendApiClient:
         Returns:
             dict: The JSON response containing the updated appointment details.
         """
-        return await self.put(f"Appointment/{appointment_id}", data)
+        response = await self.put(f"Appointment/{appointment_id}", data)
+        self.invalidate(AVAILABILITY_ENDPOINT)
+        return response
     
     async def delete_appointment(self, appointment_id: int, uuid: str) -> dict:
         """
@@ -254,14 +471,31 @@ class BackendApiClient:
         Returns:
             dict: The JSON response confirming the deletion of the appointment.
         """
-        return await self.delete(f"Appointment/{appointment_id}")
+        response = await self.delete(f"Appointment/{appointment_id}")
+        self.invalidate(AVAILABILITY_ENDPOINT)
+        return response
     
+    @staticmethod
+    def _format_appointment_date(date: Union[str, datetime]) -> str:
+        """
+        Formats an appointment date as the "YYYY-MM-DDTHH:MM" query parameter value.
+
+        Args:
+            date (Union[str, datetime]): A datetime or a "YYYY-MM-DDTHH:MM" string.
+
+        Returns:
+            str: The ISO formatted date, without seconds.
+        """
+        if isinstance(date, str):
+            date = datetime.strptime(date, '%Y-%m-%dT%H:%M')
+        return date.isoformat(timespec="minutes")
+
     async def get_specific_doctors(
         self,
         clinic_id: Optional[int] = None,
         specialization: Optional[str] = None,
         name: Optional[str] = None,
-        date: datetime = None
+        date: Union[str, datetime, None] = None
     ) -> dict:
         """
         Retrieves specific doctors by clinic ID and specialization.
@@ -270,7 +504,7 @@ class BackendApiClient:
             clinic_id (int): The ID of the clinic.
             specialization (str): The specialization to filter doctors by.
             name (str): The name to filter doctors by.
-            date (datetime): The date for which to filter doctors by their availability.
+            date (Union[str, datetime]): The date (or "YYYY-MM-DDTHH:MM" string) for which to filter doctors by their availability.
         If no parameters are provided, it retrieves all doctors.
 
         Returns:
@@ -285,16 +519,15 @@ class BackendApiClient:
         if name:
             query_params["name"] = name.lower()
         if date:
-            query_params["appointmentDate"] = datetime.strptime(date, '%Y-%m-%dT%H:%M')
-        query_string = "&".join(f"{key}={value}" for key, value in query_params.items())
-        if query_string:
-            doctor_list = await self.get(f"{base_url}?{query_string}")
-        else:
-            doctor_list = await self.get(f"{base_url}")
-        for doctor in doctor_list:
-            doctor['name'] = doctor['name'].title()
-            doctor['speciality'] = doctor['speciality'].title() 
-        return doctor_list
+            query_params["appointmentDate"] = self._format_appointment_date(date)
+
+        async def fetch():
+            doctor_list = await self.get(base_url, params=query_params)
+            for doctor in doctor_list:
+                doctor['name'] = _title(doctor['name'])
+                doctor['speciality'] = _title(doctor['speciality'])
+            return doctor_list
+        return await self._cached_get(base_url, fetch, query_params)
        
     async def get_clinic_by_name(self, name: str) -> dict:
         """
@@ -304,18 +537,22 @@ class BackendApiClient:
         Returns:
             dict: The JSON response containing the clinic details.
         """
-        clinics = await self.get(f"ClinicCards/name/{name.lower()}")
-        for clinic in clinics:
-            clinic['name'] = clinic['name'].title()
-            clinic['location'] = clinic['location'].title()
-        return clinics
+        endpoint = f"ClinicCards/name/{name.lower()}"
+
+        async def fetch():
+            clinics = await self.get(endpoint)
+            for clinic in clinics:
+                clinic['name'] = _title(clinic['name'])
+                clinic['location'] = _title(clinic['location'])
+            return clinics
+        return await self._cached_get(endpoint, fetch)
     
     async def get_specializations(
         self,
         clinic_id: Optional[int] = None,
         specialization: Optional[str] = None,
         name: Optional[str] = None,
-        date: datetime = None
+        date: Union[str, datetime, None] = None
     ) -> dict:
         """
         Retrieves specializations by clinic ID and specialization.
@@ -324,7 +561,7 @@ class BackendApiClient:
             clinic_id (int): The ID of the clinic.
             specialization (str): The specialization to filter by.
             name (str): The name to filter by.
-            date (datetime): The date for which to filter specializations.
+            date (Union[str, datetime]): The date (or "YYYY-MM-DDTHH:MM" string) for which to filter specializations.
 
         Returns:
             dict: The JSON response containing the specializations.
@@ -338,27 +575,59 @@ class BackendApiClient:
         if name:
             query_params["name"] = name.lower()
         if date:
-            query_params["appointmentDate"] = datetime.strptime(date, '%Y-%m-%dT%H:%M')
-        query_string = "&".join(f"{key}={value}" for key, value in query_params.items())
-        
-        
-        if query_string:
-            api_response_list = await self.get(f"{base_url}?{query_string}")
-        else:
-            api_response_list = await self.get(f"{base_url}")
+            query_params["appointmentDate"] = self._format_appointment_date(date)
+
+        async def fetch():
+            api_response_list = await self.get(base_url, params=query_params)
+
+            if not isinstance(api_response_list, list):
+                return []
+            spec_names = tuple(spec_name for spec_name in api_response_list if isinstance(spec_name, str))
+            if len(spec_names) != len(api_response_list):
+                logger.warning("Skipped %d non-string items in specializations list from API",
+                               len(api_response_list) - len(spec_names))
+            return _transform_specializations(spec_names)
+        return await self._cached_get(base_url, fetch, query_params)
+    
+    async def prefetch_clinic_options(
+        self,
+        clinic_ids: List[int],
+        specialization: Optional[str] = None,
+        name: Optional[str] = None,
+        date: Union[str, datetime, None] = None
+    ) -> None:
+        """
+        Loads the specializations of several clinics concurrently to warm the cache.
+        When a specialization is already known, the matching doctors of every clinic
+        are loaded in the same batch. Only the first PREFETCH_MAX_CLINICS clinics are
+        prefetched, and a call repeating one still in flight is skipped.
+        Errors are ignored, a later call simply fetches again.
 
-        
+        Args:
+            clinic_ids (List[int]): The IDs of the clinics to prefetch.
+            specialization (str): The specialization to filter by.
+            name (str): The doctor's name to filter by.
+            date (Union[str, datetime]): The appointment date to filter by.
+        """
+        clinic_ids = clinic_ids[:PREFETCH_MAX_CLINICS]
+        key = (tuple(clinic_ids), specialization, name, str(date))
+        if key in self._prefetching:
+            return
+        self._prefetching.add(key)
+        lookups = [
+            self.get_specializations(clinic_id=clinic_id, specialization=specialization, name=name, date=date)
+            for clinic_id in clinic_ids
+        ]
+        if specialization:
+            lookups.extend(
+                self.get_specific_doctors(clinic_id=clinic_id, specialization=specialization, name=name, date=date)
+                for clinic_id in clinic_ids
+            )
+        try:
+            await asyncio.gather(*lookups, return_exceptions=True)
+        finally:
+            self._prefetching.discard(key)
 
-        transformed_specializations: List[Dict[str, Union[int, str]]] = []
-        if isinstance(api_response_list, list):
-            for index, spec_name in enumerate(api_response_list):
-                if isinstance(spec_name, str): # Ensure the item from the list is a string
-                    transformed_specializations.append({"id": index, "name": spec_name.title()})
-                else:
-                    # Log a warning or handle non-string items as needed
-                    logger.warning(f"Encountered non-string item in specializations list from API: {spec_name}")
-        return transformed_specializations
-    
     async def get_appointments_by_user_uuid(self, user_uuid: str) -> List[dict]:
         """
         Retrieves appointments by user UUID.
@@ -373,7 +642,16 @@ class BackendApiClient:
     
     async def close(self):
         """
-        Closes the HTTP session.
+        Closes the HTTP session and its connection pool. Safe to call more than once;
+        the next request after close() opens a new session.
         """
-        await self.session.close()
-        logger.info("Backend API client session closed.")
\ No newline at end of file
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
+
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
+            # Give the transports a moment to actually close their sockets (aiohttp's graceful shutdown advice)
+            await asyncio.sleep(0.25)
+            logger.info("Backend API client session closed.")
\ No newline at end of file
@@ -1,7 +1,9 @@
-from typing import Optional, Any
+from typing import Optional, Tuple
 
 import pymongo
 import uuid
+from motor.motor_asyncio import AsyncIOMotorClient
+from cachetools import LRUCache
 from datetime import datetime
 
 class Database:
@@ -9,31 +11,62 @@ class Database:
         """
         Initializes the MongoDB client and connects to the database.
         """
-        self.client = pymongo.MongoClient("mongodb://localhost:27017/")
+        self.client = AsyncIOMotorClient(
+            "mongodb://localhost:27017/",
+            maxPoolSize=200,
+            minPoolSize=10,
+            maxIdleTimeMS=60000,
+            retryWrites=True,
+            appname="tg-med-bot"
+        )
         self.db = self.client["telegram_bot_db"]
 
         self.user_collection = self.db["user"]
         self.dialog_collection = self.db["dialog"]
-    
-    def check_if_user_exists(self, user_id: int) -> bool:
+        # user_id -> user_uuid never changes once assigned, so lookups are kept in memory
+        self._uuid_cache = LRUCache(maxsize=10000)
+
+    async def ping(self):
+        """
+        Checks that MongoDB is reachable, so a missing database fails at startup instead of on the first user.
         """
-        Checks if a user exists in the database.
+        await self.client.admin.command("ping")
 
-        Args:
-            user_id (int): The ID of the user to check.
+    def close(self):
+        """
+        Closes the MongoDB client and its connection pool.
+        """
+        self.client.close()
 
-        Returns:
-            bool: True if the user exists, False otherwise.
+    async def create_indexes(self):
+        """
+        Creates the indexes used by the lookups below. No-op for indexes that already exist.
         """
-        return self.user_collection.count_documents({"user_id": user_id}) > 0
+        # All user lookups go by Telegram user ID
+        await self.user_collection.create_index([("user_id", pymongo.ASCENDING)], unique=True)
     
-    def add_user(self, 
+    async def add_user(self, 
         user_id: int,
         chat_id: int, 
         username: str = str, 
         first_name: str = "", 
         last_name: str = ""
-    ):
+    ) -> bool:
+        """
+        Adds a user to the database unless a user with the same ID already exists.
+        Uses a single upsert, so the check and the insert are one atomic round trip.
+
+        Args:
+            user_id (int): The Telegram ID of the user.
+            chat_id (int): The ID of the chat with the user.
+            username (str): The Telegram username.
+            first_name (str): The user's first name.
+            last_name (str): The user's last name.
+
+        Returns:
+            bool: True if the user was inserted, False if they already existed.
+        """
+        now = datetime.now()
         user_dict = {
             "user_id": user_id,
             "chat_id": chat_id,
@@ -41,13 +74,13 @@ class Database:
             "user_uuid": str(uuid.uuid4()),
             "first_name": first_name,
             "last_name": last_name,
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
+            "created_at": now,
+            "updated_at": now
         }
-        if not self.check_if_user_exists(user_id):
-            self.user_collection.insert_one(user_dict)
+        result = await self.user_collection.update_one({"user_id": user_id}, {"$setOnInsert": user_dict}, upsert=True)
+        return result.upserted_id is not None
 
-    def get_user_uuid(self, user_id: int) -> Optional[str]:
+    async def get_user_uuid(self, user_id: int) -> Optional[str]:
         """
         Retrieves the UUID of a user by their user ID.
 
@@ -57,10 +90,17 @@ class Database:
         Returns:
             Optional[str]: The UUID of the user if found, None otherwise.
         """
-        user = self.user_collection.find_one({"user_id": user_id}, {"user_uuid": 1})
-        return user["user_uuid"] if user else None
+        try:
+            return self._uuid_cache[user_id]
+        except KeyError:
+            pass
+        user = await self.user_collection.find_one({"user_id": user_id}, {"user_uuid": 1})
+        if not user:
+            return None
+        self._uuid_cache[user_id] = user["user_uuid"]
+        return user["user_uuid"]
     
-    def get_user_fullname(self, user_id: int) -> Optional[str]:
+    async def get_user_fullname(self, user_id: int) -> Optional[str]:
         """
         Retrieves the username of a user by their user ID.
 
@@ -70,10 +110,28 @@ class Database:
         Returns:
             Optional[str]: The username of the user if found, None otherwise.
         """
-        user_firstname = self.user_collection.find_one({"user_id": user_id}, {"first_name": 1})
-        user_lastname = self.user_collection.find_one({"user_id": user_id}, {"last_name": 1})
-        if user_lastname != "":
-            user = user_firstname.get("first_name", "") +  ' ' + user_lastname.get("last_name", "")
-        else:
-            user = user_firstname.get("first_name", "")
-        return user if user else None
\ No newline at end of file
+        user = await self.user_collection.find_one({"user_id": user_id}, {"first_name": 1, "last_name": 1, "_id": 0})
+        if not user:
+            return None
+        fullname = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
+        return fullname if fullname else None
+
+    async def get_user_identity(self, user_id: int) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Retrieves the full name and the UUID of a user with a single query.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: The full name and the UUID of the user, (None, None) if not found.
+        """
+        user = await self.user_collection.find_one(
+            {"user_id": user_id}, {"first_name": 1, "last_name": 1, "user_uuid": 1, "_id": 0}
+        )
+        if not user:
+            return None, None
+        if user.get("user_uuid"):
+            self._uuid_cache[user_id] = user["user_uuid"]
+        fullname = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
+        return fullname or None, user.get("user_uuid")
@@ -0,0 +1,56 @@
+from typing import Dict, List, Tuple
+from telegram import ReplyKeyboardMarkup
+from clients.backend_api_client import BackendApiClient
+from helpers.formatting import format_appointment_time
+from helpers.keyboards import build_keyboard
+
+
+async def render_appointments_list(
+    api: BackendApiClient,
+    appointments: List[dict],
+    header_text: str
+) -> Tuple[str, Dict[int, dict], Dict[int, dict]]:
+    """
+    Renders the user's appointments as an HTML message shared by the view, edit and delete flows.
+    Doctor and clinic cards of all appointments are loaded in bulk.
+
+    Args:
+        api (BackendApiClient): The shared backend client.
+        appointments (List[dict]): The user's appointments.
+        header_text (str): The first line of the message.
+    Returns:
+        Tuple[str, Dict[int, dict], Dict[int, dict]]: The message text, the doctor cards by doctor ID
+        and the clinic cards by clinic ID.
+    """
+    doctor_cards = await api.get_doctor_cards_by_ids([appointment.get("doctorId") for appointment in appointments])
+    clinic_cards = await api.get_clinic_cards_by_ids([doctor_card.get("clinicId") for doctor_card in doctor_cards.values()])
+    parts = [f"{header_text}\n\n"]
+    for temp_id, appointment in enumerate(appointments, 1):
+        doctor_card = doctor_cards[appointment.get("doctorId")]
+        clinic_card = clinic_cards[doctor_card.get("clinicId")]
+        formatted_time = format_appointment_time(appointment.get("appointmentTime"))
+        parts.append(
+            f"Запись на прием <b>#{temp_id}:</b>\n"
+            f"Врач: <b>{doctor_card.get('name')}</b>\n"
+            f"Номер телефона: <b>{doctor_card.get('phoneNumber')}</b>\n"
+            f"Специализация: <b>{doctor_card.get('speciality')}</b>\n"
+            f"Клиника: <b>{clinic_card.get('name')}</b>\n"
+            f"Адрес: <b>{clinic_card.get('location')}</b>\n"
+            f"Телефон клиники: <b>{clinic_card.get('phone')}</b>\n"
+            f"Дата и время приема: <b>{formatted_time}</b>\n"
+            f"\n"
+        )
+    return "".join(parts), doctor_cards, clinic_cards
+
+
+def appointment_options_keyboard(appointments_count: int) -> ReplyKeyboardMarkup:
+    """
+    Builds the "Запись #N" selection keyboard with a cancel button.
+
+    Args:
+        appointments_count (int): The number of listed appointments.
+    Returns:
+        ReplyKeyboardMarkup: The selection keyboard.
+    """
+    options = tuple(f"Запись #{i}" for i in range(1, appointments_count + 1))
+    return build_keyboard(options, 2, True, "Отмена")
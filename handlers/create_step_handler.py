@@ -1,16 +1,33 @@
 import telegram
-from telegram import Update, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
+from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler
-from clients.backend_api_client import BackendApiClient
-from datetime import date, timedelta, datetime
+from datetime import date, datetime
 from typing import Optional
-import db.mongodb_service as db
+import aiohttp
+import asyncio
 import logging
+from helpers.formatting import format_appointment_time
+from helpers.dates import is_bookable_date, next_two_weeks
+from helpers.keyboards import build_keyboard
 
 logger = logging.getLogger(__name__)
 
+# Поля, при наличии которых запись можно сразу отправить на подтверждение
+PREFILL_FIELDS = ("clinic", "specialization", "doctor", "date", "time")
+
+BACK_TO_CLINIC = "Назад (к клинике)"
+BACK_TO_SPECIALIZATION = "Назад (к специализации)"
+BACK_TO_DOCTOR = "Назад (к врачу)"
+BACK_TO_DATE = "Назад (к дате)"
+# Кнопка "Назад" -> поля записи, которые нужно сбросить
+BACK_LABELS = {
+    BACK_TO_CLINIC: ("clinic_id", "clinic_name"),
+    BACK_TO_SPECIALIZATION: ("specialization_id", "specialization_name"),
+    BACK_TO_DOCTOR: ("doctor_id", "doctor_name"),
+    BACK_TO_DATE: ("chosen_date_str",),
+}
+
 
-db = db.Database()
 class CreateStepHandler:
     """
     Handles button interactions in the Telegram bot.
@@ -26,8 +43,8 @@ class CreateStepHandler:
     #def __init__(self):
         #self.context.user_data.setdefault("create_appointment_data", {})
 
-    async def _create_keyboard(self, options: list, items_per_row: int = 2, 
-                               add_back_button: bool = True, back_button_text: str = "Назад") -> ReplyKeyboardMarkup:
+    def _create_keyboard(self, options: list, items_per_row: int = 2, 
+                         add_back_button: bool = True, back_button_text: str = "Назад") -> ReplyKeyboardMarkup:
         """ 
         Creates a keyboard layout for the given options.
         
@@ -40,15 +57,50 @@ class CreateStepHandler:
             ReplyKeyboardMarkup: A keyboard markup object with the specified options.
         
         """
-        buttons = [KeyboardButton(option) for option in options]
-        keyboard_layout = [buttons[i:i + items_per_row] for i in range(0, len(buttons), items_per_row)]
-        if add_back_button:
-            keyboard_layout.append([KeyboardButton(back_button_text)])
-        return ReplyKeyboardMarkup(
-            keyboard_layout,
-            one_time_keyboard=True,
-            resize_keyboard=True
-        )
+        return build_keyboard(tuple(options), items_per_row, add_back_button, back_button_text)
+
+    async def _go_back(self, update: Update, context: ContextTypes.DEFAULT_TYPE, label: str) -> int:
+        """
+        Handles a "Back" button: drops the data of the step being left and prompts the target step again.
+
+        Args:
+            update (Update): The Telegram update containing the user's message.
+            context (ContextTypes.DEFAULT_TYPE): The context containing user data.
+            label (str): The text of the pressed "Back" button, a key of BACK_LABELS.
+        Returns:
+            int: The state of the step the user returns to.
+        """
+        # Шаг, к которому возвращается каждая кнопка "Назад"
+        back_prompts = {
+            BACK_TO_CLINIC: self.prompt_clinic,
+            BACK_TO_SPECIALIZATION: self.prompt_specialization,
+            BACK_TO_DOCTOR: self.prompt_doctor,
+            BACK_TO_DATE: self.prompt_date,
+        }
+        appointment_data = context.user_data["create_appointment_data"]
+        for field in BACK_LABELS[label]:
+            appointment_data.pop(field, None)
+        context.user_data.pop("_temp_available_times", None)
+        context.user_data.pop("_temp_available_times_set", None)
+        return await back_prompts[label](update, context)
+
+    def _specialization_filters(self, context: ContextTypes.DEFAULT_TYPE) -> dict:
+        """
+        Builds the specialization filters from the data prefilled by the LLM.
+
+        Args:
+            context (ContextTypes.DEFAULT_TYPE): The context containing user data.
+        Returns:
+            dict: Keyword arguments for BackendApiClient.get_specializations (without clinic_id).
+        """
+        prefilled_info = context.user_data["prefilled_info"]
+        prefilled_date = prefilled_info.get("date", None)
+        prefilled_time = prefilled_info.get("time", None)
+        return {
+            "specialization": prefilled_info.get("specialization", None),
+            "name": prefilled_info.get("doctor", None),
+            "date": f"{prefilled_date}T{prefilled_time}" if prefilled_date and prefilled_time else None
+        }
 
     async def start_appointment_creation(self, update: Update, context: ContextTypes.DEFAULT_TYPE, prefilled_data: Optional[dict] = None) -> int:
         """
@@ -61,10 +113,69 @@ class CreateStepHandler:
             int: The next state in the conversation flow.
         """
         context.user_data.clear()
-        context.user_data.setdefault("create_appointment_data", {})
-        context.user_data["prefilled_info"] = prefilled_data or {} 
+        context.user_data.update(create_appointment_data={}, prefilled_info=prefilled_data or {})
+        if await self._resolve_prefilled(context):
+            # Всё уже известно из сообщения пользователя, сразу переходим к подтверждению
+            return await self.prompt_confirmation(update, context)
         return await self.prompt_clinic(update, context)
 
+    async def _resolve_prefilled(self, context: ContextTypes.DEFAULT_TYPE) -> bool:
+        """
+        Fills the appointment data directly when the LLM prefilled every field and each of them
+        matches exactly one backend record, so the user only has to confirm.
+
+        Args:
+            context (ContextTypes.DEFAULT_TYPE): The context containing user data.
+        Returns:
+            bool: True if the appointment data is complete, False to go through the regular steps.
+        """
+        prefilled_info = context.user_data["prefilled_info"]
+        if not all(prefilled_info.get(field) for field in PREFILL_FIELDS):
+            return False
+        prefilled_time = prefilled_info["time"]
+        try:
+            # Модель может вернуть время вроде "10:00:00" или "10.00", такие данные уходят в обычный сценарий
+            appointment_datetime = datetime.strptime(f"{prefilled_info['date']} {prefilled_time}", "%Y-%m-%d %H:%M")
+        except ValueError:
+            return False
+        # Та же граница, что и в prompt_date: запись возможна только на ближайшие две недели
+        if not is_bookable_date(appointment_datetime.date()) or appointment_datetime < datetime.now():
+            return False
+        appointment_datetime_iso = appointment_datetime.isoformat()
+
+        api = context.application.bot_data["api"]
+        filters = self._specialization_filters(context)
+        try:
+            clinics = await api.get_clinic_by_name(name=prefilled_info["clinic"])
+            if len(clinics) != 1:
+                return False
+            clinic = clinics[0]
+            # Специальности и врачи зависят только от клиники, поэтому запрашиваем их одновременно
+            specializations, doctors = await asyncio.gather(
+                api.get_specializations(clinic_id=clinic["clinicId"], **filters),
+                api.get_specific_doctors(clinic_id=clinic["clinicId"], **filters)
+            )
+            if len(specializations) != 1 or len(doctors) != 1:
+                return False
+            doctor = doctors[0]
+            times = await api.get_doctor_working_hours(doctor_id=doctor["doctorId"], date=prefilled_info["date"])
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as e:
+            logger.warning("Failed to resolve prefilled appointment data: %s", e)
+            return False
+        if prefilled_time not in times:
+            return False
+
+        context.user_data["create_appointment_data"].update(
+            clinic_id=clinic["clinicId"],
+            clinic_name=clinic["name"],
+            specialization_id=specializations[0]["id"],
+            specialization_name=specializations[0]["name"],
+            doctor_id=doctor["doctorId"],
+            doctor_name=doctor["name"],
+            appointment_datetime_iso=appointment_datetime_iso
+        )
+        return True
+
     # ---- Step 1: Clinic Selection ----
     async def prompt_clinic(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """
@@ -77,56 +188,105 @@ class CreateStepHandler:
         Returns:
             int: The next state in the conversation flow, CHOOSE_CLINIC.
         """
+        api = context.application.bot_data["api"]
         prefilled_clinic = context.user_data["prefilled_info"].get("clinic", None)
         if prefilled_clinic:
-            clinics = await BackendApiClient().get_clinic_by_name(name=prefilled_clinic)
+            clinics = await api.get_clinic_by_name(name=prefilled_clinic)
         else:
-            clinics = await BackendApiClient().get_clinic_cards()
+            clinics = await api.get_clinic_cards()
         if not clinics:
             await update.effective_message.reply_text("Извините, в данный момент нет доступных клиник.")
             return ConversationHandler.END
         
-        clinic_names = [clinic["name"] for clinic in clinics]
-        context.user_data["_temp_clinics_list"] = clinics # Сохраняем для быстрой выборки
+        context.user_data["_temp_clinics_by_id"] = {str(clinic["clinicId"]): clinic["name"] for clinic in clinics} # Храним только ID и названия
+        # Пока пользователь выбирает клинику, параллельно загружаем специальности (и врачей) первых предложенных клиник
+        context.application.create_task(
+            api.prefetch_clinic_options(
+                [clinic["clinicId"] for clinic in clinics], **self._specialization_filters(context)
+            )
+        )
 
-        keyboard = await self._create_keyboard(clinic_names, items_per_row=1, add_back_button=True, back_button_text="Отмена")
-        await update.effective_message.reply_text("Выберите клинику:", reply_markup=keyboard)
+        keyboard = InlineKeyboardMarkup(
+            [[InlineKeyboardButton(clinic["name"], callback_data=f"clinic:{clinic['clinicId']}")] for clinic in clinics]
+            + [[InlineKeyboardButton("Отмена", callback_data="clinic:cancel")]]
+        )
+        # При повторном запросе у прошлого списка клиник убираем кнопки, активным остаётся только новый
+        await self._close_clinic_keyboard(update, context)
+        message = await update.effective_message.reply_text("Выберите клинику:", reply_markup=keyboard)
+        context.user_data["_clinic_keyboard_message_id"] = message.message_id
         return self.CHOOSE_CLINIC
 
+    async def _close_clinic_keyboard(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        Removes the inline buttons from the last clinic list sent to the user, if it is still open.
+
+        Args:
+            update (Update): The Telegram update of the current step.
+            context (ContextTypes.DEFAULT_TYPE): The context containing user data.
+        """
+        message_id = context.user_data.pop("_clinic_keyboard_message_id", None)
+        if message_id is None:
+            return
+        try:
+            await context.bot.edit_message_reply_markup(
+                chat_id=update.effective_chat.id, message_id=message_id, reply_markup=None
+            )
+        except telegram.error.BadRequest as e:
+            # Сообщение уже изменено или удалено пользователем
+            logger.debug("Could not close the clinic keyboard: %s", e)
+
+    async def expire_clinic_keyboard(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        Answers a press on a clinic list that no longer belongs to an active appointment creation
+        and removes its buttons.
+
+        Args:
+            update (Update): The Telegram update containing the callback query.
+            context (ContextTypes.DEFAULT_TYPE): The context of the callback.
+        """
+        query = update.callback_query
+        await query.answer("Этот список клиник уже неактуален.")
+        try:
+            await query.edit_message_reply_markup(reply_markup=None)
+        except telegram.error.BadRequest as e:
+            logger.debug("Could not close the stale clinic keyboard: %s", e)
+
     async def process_clinic_choice(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """
-        Processes the user's choice of clinic.
+        Processes the user's choice of clinic made with the inline keyboard ("clinic:<id>" callback data).
         If the user selects a clinic, stores the clinic ID and name in the appointment data.
-        If the user cancels, ends the conversation.
+        If the user cancels, ends the conversation. Typed text is answered with the clinic list again.
         
         Args:
-            update (Update): The Telegram update containing the user's message.
+            update (Update): The Telegram update containing the callback query or the user's message.
             context (ContextTypes.DEFAULT_TYPE): The context containing user data.
         Returns:
             int: The next state in the conversation flow, CHOOSE_SPECIALIZATION.
 
         """
-        chosen_clinic_name = update.message.text
+        query = update.callback_query
         user_data = context.user_data
         appointment_data = user_data["create_appointment_data"]
 
-        if chosen_clinic_name == "Отмена":
-            return await self.cancel(update, context)
+        selected_clinic_name = None
+        if query:
+            await query.answer()
+            chosen_clinic_id = query.data.removeprefix("clinic:")
+            if chosen_clinic_id == "cancel":
+                return await self.cancel(update, context)
 
-        selected_clinic = None
-        for clinic in user_data.get("_temp_clinics_list", []):
-            if clinic["name"] == chosen_clinic_name:
-                selected_clinic = clinic
-                break
+            selected_clinic_name = user_data.get("_temp_clinics_by_id", {}).get(chosen_clinic_id)
         
-        if not selected_clinic:
+        if not selected_clinic_name:
             await update.effective_message.reply_text("Пожалуйста, выберите клинику из списка.")
             return await self.prompt_clinic(update, context) # Повторить запрос клиники
 
-        appointment_data["clinic_id"] = selected_clinic["clinicId"]
-        appointment_data["clinic_name"] = selected_clinic["name"]
-        user_data.pop("_temp_clinics_list", None) # Очистить временные данные   
-        logger.info(f"Selected clinic: {appointment_data['clinic_name']} (ID: {appointment_data['clinic_id']})")
+        appointment_data["clinic_id"] = int(chosen_clinic_id)
+        appointment_data["clinic_name"] = selected_clinic_name
+        user_data.pop("_temp_clinics_by_id", None) # Очистить временные данные   
+        user_data.pop("_clinic_keyboard_message_id", None) # Кнопки убираются вместе с заменой текста
+        await query.edit_message_text(f"Клиника: {selected_clinic_name}")
+        logger.info("Selected clinic: %s (ID: %s)", appointment_data["clinic_name"], appointment_data["clinic_id"])
         return await self.prompt_specialization(update, context)
 
     # ---- Step 2: Specialization Selection ----
@@ -141,26 +301,17 @@ class CreateStepHandler:
             int: The next state in the conversation flow, CHOOSE_SPECIALIZATION.
         """
         clinic_id = context.user_data["create_appointment_data"].get("clinic_id")
-        prefilled_spec = context.user_data["prefilled_info"].get("specialization", None)
-        prefilled_doc = context.user_data["prefilled_info"].get("doctor", None)
-        prefilled_date = context.user_data["prefilled_info"].get("date", None)
-        prefilled_time = context.user_data["prefilled_info"].get("time", None)
-        if prefilled_date and prefilled_time:
-            prefilled_datetime = f"{prefilled_date}T{prefilled_time}"
-        else:
-            prefilled_datetime = None
-
-
-        specializations = await BackendApiClient().get_specializations(clinic_id=clinic_id, 
-                specialization=prefilled_spec, name=prefilled_doc, date=prefilled_datetime)
+        specializations = await context.application.bot_data["api"].get_specializations(
+            clinic_id=clinic_id, **self._specialization_filters(context)
+        )
         if not specializations:
             await update.effective_message.reply_text("Нет доступных специализаций.")
             return await self.prompt_clinic(update, context)
 
         spec_names = [spec["name"] for spec in specializations]
-        context.user_data["_temp_specs_list"] = specializations
+        context.user_data["_temp_specs_by_name"] = {spec["name"]: spec["id"] for spec in specializations}
 
-        keyboard = await self._create_keyboard(spec_names, items_per_row=3, back_button_text="Назад (к клинике)")
+        keyboard = self._create_keyboard(spec_names, items_per_row=3, back_button_text=BACK_TO_CLINIC)
         await update.effective_message.reply_text("Выберите специальность врача:", reply_markup=keyboard)
         return self.CHOOSE_SPECIALIZATION
 
@@ -179,24 +330,18 @@ class CreateStepHandler:
         user_data = context.user_data
         appointment_data = user_data["create_appointment_data"]
 
-        if chosen_spec_name == "Назад (к клинике)":
-            appointment_data.pop("clinic_id", None)
-            appointment_data.pop("clinic_name", None)
-            return await self.prompt_clinic(update, context)
+        if chosen_spec_name in BACK_LABELS:
+            return await self._go_back(update, context, chosen_spec_name)
 
-        selected_spec = None
-        for spec in user_data.get("_temp_specs_list", []):
-            if spec["name"] == chosen_spec_name:
-                selected_spec = spec
-                break
+        selected_spec_id = user_data.get("_temp_specs_by_name", {}).get(chosen_spec_name)
         
-        if not selected_spec:
+        if selected_spec_id is None:
             await update.effective_message.reply_text("Пожалуйста, выберите специальность из списка.")
             return await self.prompt_specialization(update, context)
 
-        appointment_data["specialization_id"] = selected_spec["id"]
-        appointment_data["specialization_name"] = selected_spec["name"]
-        user_data.pop("_temp_specs_list", None)
+        appointment_data["specialization_id"] = selected_spec_id
+        appointment_data["specialization_name"] = chosen_spec_name
+        user_data.pop("_temp_specs_by_name", None)
 
         return await self.prompt_doctor(update, context)
 
@@ -211,15 +356,16 @@ class CreateStepHandler:
         Returns:
             int: The next state in the conversation flow, CHOOSE_DOCTOR.
         """
-        prefilled_doc = context.user_data["prefilled_info"].get("doctor", None)
-        prefilled_date = context.user_data["prefilled_info"].get("date", None)
-        prefilled_time = context.user_data["prefilled_info"].get("time", None)
+        prefilled_info = context.user_data["prefilled_info"]
+        prefilled_doc = prefilled_info.get("doctor", None)
+        prefilled_date = prefilled_info.get("date", None)
+        prefilled_time = prefilled_info.get("time", None)
         if prefilled_date and prefilled_time:
             prefilled_datetime = f"{prefilled_date}T{prefilled_time}"
         else:
             prefilled_datetime = None
         appointment_data = context.user_data["create_appointment_data"]
-        doctors = await BackendApiClient().get_specific_doctors(
+        doctors = await context.application.bot_data["api"].get_specific_doctors(
             specialization=appointment_data.get("specialization_name"),
             clinic_id=appointment_data.get("clinic_id"),
             name=prefilled_doc,
@@ -233,9 +379,9 @@ class CreateStepHandler:
             return await self.prompt_specialization(update, context)
 
         doctor_names = [doc["name"] for doc in doctors]
-        context.user_data["_temp_doctors_list"] = doctors
+        context.user_data["_temp_doctors_by_name"] = {doc["name"]: doc["doctorId"] for doc in doctors}
 
-        keyboard = await self._create_keyboard(doctor_names, items_per_row=1, back_button_text="Назад (к специализации)")
+        keyboard = self._create_keyboard(doctor_names, items_per_row=1, back_button_text=BACK_TO_SPECIALIZATION)
         await update.effective_message.reply_text("Выберите врача:", reply_markup=keyboard)
         return self.CHOOSE_DOCTOR
     
@@ -254,24 +400,18 @@ class CreateStepHandler:
         user_data = context.user_data
         appointment_data = user_data["create_appointment_data"]
 
-        if chosen_doc_name == "Назад (к специализации)":
-            appointment_data.pop("specialization_id", None)
-            appointment_data.pop("specialization_name", None)
-            return await self.prompt_specialization(update, context)
+        if chosen_doc_name in BACK_LABELS:
+            return await self._go_back(update, context, chosen_doc_name)
 
-        selected_doc = None
-        for doc in user_data.get("_temp_doctors_list", []):
-            if doc["name"] == chosen_doc_name:
-                selected_doc = doc
-                break
+        selected_doc_id = user_data.get("_temp_doctors_by_name", {}).get(chosen_doc_name)
         
-        if not selected_doc:
+        if selected_doc_id is None:
             await update.effective_message.reply_text("Пожалуйста, выберите врача из списка.")
             return await self.prompt_doctor(update, context)
 
-        appointment_data["doctor_id"] = selected_doc["doctorId"]
-        appointment_data["doctor_name"] = selected_doc["name"]
-        user_data.pop("_temp_doctors_list", None)
+        appointment_data["doctor_id"] = selected_doc_id
+        appointment_data["doctor_name"] = chosen_doc_name
+        user_data.pop("_temp_doctors_by_name", None)
         
         return await self.prompt_date(update, context)    
 
@@ -289,19 +429,14 @@ class CreateStepHandler:
         prefilled_date = context.user_data["prefilled_info"].get("date", None)
         opts = []
         prefilled_date_obj = datetime.strptime(prefilled_date, "%Y-%m-%d").date() if prefilled_date else None
-        if prefilled_date_obj:    
-            if prefilled_date_obj > date.today() + timedelta(days=14) or prefilled_date_obj < date.today():
-                prefilled_date_obj = None
-        start_date_val = date.today()
-        dates_next_two_weeks = []
-        for i in range(14):
-            next_date = start_date_val + timedelta(days=i)
-            dates_next_two_weeks.append(next_date.strftime("%Y-%m-%d"))
+        today = date.today()
+        if prefilled_date_obj and not is_bookable_date(prefilled_date_obj):
+            prefilled_date_obj = None
         if prefilled_date_obj:
             opts.append(prefilled_date_obj.strftime("%Y-%m-%d"))
-            keyboard = await self._create_keyboard(options=opts, items_per_row=1, back_button_text="Назад (к врачу)")
+            keyboard = self._create_keyboard(options=opts, items_per_row=1, back_button_text=BACK_TO_DOCTOR)
         else:
-            keyboard = await self._create_keyboard(dates_next_two_weeks, items_per_row=3, back_button_text="Назад (к врачу)")
+            keyboard = self._create_keyboard(next_two_weeks(today.toordinal()), items_per_row=3, back_button_text=BACK_TO_DOCTOR)
         await update.effective_message.reply_text("Выберите дату приема:", reply_markup=keyboard)
         return self.CHOOSE_DATE
 
@@ -320,24 +455,23 @@ class CreateStepHandler:
         user_data = context.user_data
         appointment_data = user_data["create_appointment_data"]
 
-        if chosen_date_str == "Назад (к врачу)":
-            appointment_data.pop("doctor_id", None)
-            appointment_data.pop("doctor_name", None)
-            return await self.prompt_doctor(update, context)
+        if chosen_date_str in BACK_LABELS:
+            return await self._go_back(update, context, chosen_date_str)
 
         try:
-            datetime.strptime(chosen_date_str, "%Y-%m-%d")
+            # Сохраняем нормализованную дату: введённое вручную "2026-10-5" тоже проходит strptime
+            chosen_date_str = datetime.strptime(chosen_date_str, "%Y-%m-%d").date().isoformat()
         except ValueError:
             await update.effective_message.reply_text("Некорректный формат даты. Выберите из предложенных.")
             return await self.prompt_date(update, context) 
 
         appointment_data["chosen_date_str"] = chosen_date_str
         
-        prefilled_time = context.user_data["prefilled_info"].get("time", None)
+        prefilled_time = user_data["prefilled_info"].get("time", None)
 
 
         # Запрашиваем время для выбранной даты
-        times = await BackendApiClient().get_doctor_working_hours(
+        times = await context.application.bot_data["api"].get_doctor_working_hours(
             doctor_id=appointment_data.get("doctor_id"),
             date=chosen_date_str
         )
@@ -349,10 +483,11 @@ class CreateStepHandler:
             appointment_data.pop("chosen_date_str", None)
             return await self.prompt_date(update, context) 
 
-        context.user_data["_temp_available_times"] = times
+        context.user_data["_temp_available_times"] = times # Порядок для клавиатуры
+        context.user_data["_temp_available_times_set"] = set(times) # Быстрая проверка выбранного времени
         if prefilled_time and prefilled_time in times:
             times = [prefilled_time]
-        keyboard = await self._create_keyboard(times, items_per_row=3, back_button_text="Назад (к дате)")
+        keyboard = self._create_keyboard(times, items_per_row=3, back_button_text=BACK_TO_DATE)
         await update.effective_message.reply_text("Выберите время приема:", reply_markup=keyboard)
         return self.CHOOSE_TIME
 
@@ -373,53 +508,36 @@ class CreateStepHandler:
         user_data = context.user_data
         appointment_data = user_data["create_appointment_data"]
 
-        if chosen_time_str == "Назад (к дате)":
-            appointment_data.pop("chosen_date_str", None)
-            user_data.pop("_temp_available_times", None)
-            return await self.prompt_date(update, context)
+        if chosen_time_str in BACK_LABELS:
+            return await self._go_back(update, context, chosen_time_str)
 
         available_times = user_data.get("_temp_available_times", [])
-        if chosen_time_str not in available_times:
+        if chosen_time_str not in user_data.get("_temp_available_times_set", ()):
             await update.effective_message.reply_text("Пожалуйста, выберите время из списка.")
 
-            keyboard = await self._create_keyboard(available_times, items_per_row=3, back_button_text="Назад (к дате)")
+            keyboard = self._create_keyboard(available_times, items_per_row=3, back_button_text=BACK_TO_DATE)
             await update.effective_message.reply_text("Выберите время приема:", reply_markup=keyboard)
             return self.CHOOSE_TIME
 
         chosen_date_str = appointment_data["chosen_date_str"]
-        logger.info(f"Chosen date: {chosen_date_str}, chosen time: {chosen_time_str}")
-        dt_object = None
-        try:
-            date_obj = datetime.strptime(chosen_date_str, "%Y-%m-%d").date()
-            time_obj = datetime.strptime(chosen_time_str, "%H:%M").time()
-            dt_object_combined = datetime.combine(date_obj, time_obj)
-            logger.info(f"Selected date and time: {dt_object_combined}")
-            if dt_object_combined < datetime.now():
-                await update.effective_message.reply_text(
-                    "Выбранная дата и время уже прошли. Пожалуйста, выберите другую дату и время."
-                )
-                user_data.pop("_temp_available_times", None)
-                # Вернуться к выбору даты, так как время на эту дату может быть неактуально
-                return await self.prompt_date(update, context)
-            
-            dt_object = dt_object_combined.strftime("%Y-%m-%dT%H:%M:%S") # ISO формат
-
-        except ValueError:
-            await update.effective_message.reply_text("Некорректный формат. Пожалуйста, выберите из списка.")
-            keyboard = await self._create_keyboard(available_times, items_per_row=3, back_button_text="Назад (к дате)")
-            await update.effective_message.reply_text("Выберите время приема:", reply_markup=keyboard)
-            return self.CHOOSE_TIME
-        
-        if dt_object:
-            appointment_data["appointment_datetime_iso"] = dt_object
+        logger.info("Chosen date: %s, chosen time: %s", chosen_date_str, chosen_time_str)
+        dt_object = f"{chosen_date_str}T{chosen_time_str}:00" # ISO формат, обе части уже провалидированы
+        logger.info("Selected date and time: %s", dt_object)
+        if datetime.fromisoformat(dt_object) < datetime.now():
+            await update.effective_message.reply_text(
+                "Выбранная дата и время уже прошли. Пожалуйста, выберите другую дату и время."
+            )
             user_data.pop("_temp_available_times", None)
-            user_data.pop("chosen_date_str", None) # Больше не нужно
-            return await self.prompt_confirmation(update, context)
-        else:
-            # Этого не должно случиться (надеюсь), но на всякий случай, если что-то пошло не так, а то вдруг дата невалидная, ну такое бывает, не? вроде как, но я не знаю
-            await update.effective_message.reply_text("Произошла ошибка. Попробуйте снова.")
+            user_data.pop("_temp_available_times_set", None)
+            # Вернуться к выбору даты, так как время на эту дату может быть неактуально
             return await self.prompt_date(update, context)
 
+        appointment_data["appointment_datetime_iso"] = dt_object
+        user_data.pop("_temp_available_times", None)
+        user_data.pop("_temp_available_times_set", None)
+        user_data.pop("chosen_date_str", None) # Больше не нужно
+        return await self.prompt_confirmation(update, context)
+
     # ---- Step 6: Confirmation ----
     async def prompt_confirmation(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         appointment_data = context.user_data["create_appointment_data"]
@@ -438,7 +556,7 @@ class CreateStepHandler:
             f"Врач: {appointment_data.get('doctor_name', 'N/A')}\n"
             f"Дата и время: {dt_readable}"
         )
-        keyboard = await self._create_keyboard(["Подтвердить", "Изменить", "Отменить"], items_per_row=3, add_back_button=False)
+        keyboard = self._create_keyboard(["Подтвердить", "Изменить", "Отменить"], items_per_row=3, add_back_button=False)
         await update.effective_message.reply_text(text, reply_markup=keyboard)
         return self.CONFIRMATION    
 
@@ -446,20 +564,20 @@ class CreateStepHandler:
         choice = update.message.text
         
         if choice == "Подтвердить":
+            patient_name, patient_uuid = await context.application.bot_data["db"].get_user_identity(update.effective_user.id)
             request_body = {
-                "patientName" : db.get_user_fullname(update.effective_user.id),
-                "patientUuid" : db.get_user_uuid(update.effective_user.id),
+                "patientName" : patient_name,
+                "patientUuid" : patient_uuid,
                 "phone" : "+7(999)999-99-99",
                 "appointmentTime" : context.user_data["create_appointment_data"]["appointment_datetime_iso"],
                 "doctorId" : context.user_data["create_appointment_data"]["doctor_id"]
             }
-            logger.info(f"Creating appointment with data: {request_body}")
-            response = await BackendApiClient().post_appointment(request_body)
+            logger.info("Creating appointment with data: %s", request_body)
+            response = await context.application.bot_data["api"].post_appointment(request_body)
             if response:
                 await update.effective_message.reply_text("Вы успешно записаны!", reply_markup=ReplyKeyboardRemove())
                 appointment_time_str = response['appointmentTime']
-                dt_object = datetime.fromisoformat(appointment_time_str)
-                formatted_time = dt_object.strftime("%d.%m %H:%M")
+                formatted_time = format_appointment_time(appointment_time_str)
                 text = (
                     "Данные записи:\n"
                     f"Пациент: <b>{response['patientName']}</b>\n"
@@ -497,6 +615,7 @@ class CreateStepHandler:
         Returns:
             int: ConversationHandler.END to end the conversation.
             """
+        await self._close_clinic_keyboard(update, context)
         await update.effective_message.reply_text(
             "Создание записи отменено.",
             reply_markup=ReplyKeyboardRemove() 
@@ -1,13 +1,17 @@
-import telegram
-from telegram import Update, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
+from telegram import Update, ReplyKeyboardRemove
 from telegram.ext import ContextTypes, ConversationHandler
-from clients.backend_api_client import BackendApiClient
-from datetime import date, timedelta, datetime
-import db.mongodb_service as db
+from telegram.constants import ChatAction
 import logging
+from helpers.formatting import format_appointment_time
+from helpers.keyboards import RECORD_OPTION_RE, YES_NO_KEYBOARD
+from handlers.appointment_list import render_appointments_list, appointment_options_keyboard
+import time
 
 logger = logging.getLogger(__name__)
-db = db.Database()
+
+# Сколько секунд список записей из предыдущего шага считается актуальным
+APPOINTMENTS_CACHE_TTL = 60
+
 
 class DeleteHandler:
     """
@@ -18,30 +22,6 @@ class DeleteHandler:
 
     CHOOSE_APPOINTMENT, CONFIRMATION = range(10,12)
 
-    async def _create_keyboard(self, options: list, items_per_row: int = 2, 
-                               add_back_button: bool = True, back_button_text: str = "Назад") -> ReplyKeyboardMarkup:
-        """ 
-        Creates a keyboard layout for the given options.
-        
-        Args:
-            options (list): List of options to create buttons for.
-            items_per_row (int): Number of buttons per row.
-            add_back_button (bool): Whether to add a "Back" button.
-            back_button_text (str): Text for the "Back" button.
-        Returns:
-            ReplyKeyboardMarkup: A keyboard markup object with the specified options.
-        
-        """
-        buttons = [KeyboardButton(option) for option in options]
-        keyboard_layout = [buttons[i:i + items_per_row] for i in range(0, len(buttons), items_per_row)]
-        if add_back_button:
-            keyboard_layout.append([KeyboardButton(back_button_text)])
-        return ReplyKeyboardMarkup(
-            keyboard_layout,
-            one_time_keyboard=True,
-            resize_keyboard=True
-        )
-
     async def start_appointment_deletion(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """
         Starts the appointment editing process by prompting the user to choose an appointment.
@@ -64,47 +44,40 @@ class DeleteHandler:
         Returns:
             int: The next step in the conversation.
         """
+        # Сразу показываем, что бот работает: список собирается из нескольких запросов к бэкенду
+        context.application.create_task(
+            context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
+        )
         user_id = update.effective_user.id
-        user_uuid = db.get_user_uuid(user_id)
+        user_uuid = await context.application.bot_data["db"].get_user_uuid(user_id)
 
         if not user_uuid:
             await update.message.reply_text("Пожалуйста, зарегистрируйтесь перед редактированием записей.")
-            return
+            return ConversationHandler.END
 
         try:
-            appointments = await BackendApiClient().get_appointments_by_user_uuid(user_uuid)
+            api = context.application.bot_data["api"]
+            appointments = await api.get_appointments_by_user_uuid(user_uuid)
+            # Запоминаем список, чтобы не запрашивать его повторно на шаге выбора записи
+            context.user_data["cached_appointments"] = appointments
+            context.user_data["cached_appointments_at"] = time.monotonic()
             if not appointments:
                 await update.message.reply_text("У вас нет записей на прием для отмены.")
-                return
-            temp_id = 1
-            response_text = "Выберете запись, которую нужно удалить:\n\n"
-            for appointment in appointments:
-                doctor_card = await BackendApiClient().get_doctor_card(appointment.get("doctorId"))
-                clinic_card = await BackendApiClient().get_clinic_card(doctor_card.get("clinicId"))
-                appointment_time_str = appointment.get("appointmentTime")
-                dt_object = datetime.fromisoformat(appointment_time_str)
-                formatted_time = dt_object.strftime("%d.%m %H:%M")
-                response_text += (
-                    f"Запись на прием <b>#{temp_id}:</b>\n"
-                    f"Врач: <b>{doctor_card.get('name').title()}</b>\n"
-                    f"Номер телефона: <b>{doctor_card.get('phoneNumber')}</b>\n"
-                    f"Специализация: <b>{doctor_card.get('speciality').title()}</b>\n"
-                    f"Клиника: <b>{clinic_card.get('name').title()}</b>\n"
-                    f"Адрес: <b>{clinic_card.get('location').title()}</b>\n"
-                    f"Телефон клиники: <b>{clinic_card.get('phone')}</b>\n"
-                    f"Дата и время приема: <b>{formatted_time}</b>\n"
-                    f"\n"
-                )
-                temp_id += 1            
+                return ConversationHandler.END
+            response_text, doctor_cards, clinic_cards = await render_appointments_list(
+                api, appointments, "Выберете запись, которую нужно удалить:"
+            )
+            # Карточки понадобятся на шаге подтверждения, запоминаем их, чтобы не запрашивать снова
+            context.user_data["doctor_cards_by_id"] = doctor_cards
+            context.user_data["clinic_cards_by_id"] = clinic_cards
             await update.message.reply_text(response_text, parse_mode='HTML')
-            options = [f"Запись #{i + 1}" for i in range(len(appointments))]
-            keyboard = await self._create_keyboard(options, items_per_row=2, add_back_button=True, back_button_text="Отмена")
-            await update.message.reply_text("Выберите запись для отмены:", reply_markup=keyboard)
+            await update.message.reply_text("Выберите запись для отмены:", reply_markup=appointment_options_keyboard(len(appointments)))
             return self.CHOOSE_APPOINTMENT
 
         except Exception as e:
-            logger.error(f"Error fetching appointments: {e}")
+            logger.error("Error fetching appointments: %s", e)
             await update.message.reply_text("Произошла ошибка при получении записей. Пожалуйста, попробуйте позже.")
+            return ConversationHandler.END
     
     async def choose_appointment(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """
@@ -117,26 +90,29 @@ class DeleteHandler:
             int: The next step in the conversation.
         """
         user_id = update.effective_user.id
-        user_uuid = db.get_user_uuid(user_id)
+        user_uuid = await context.application.bot_data["db"].get_user_uuid(user_id)
 
         if not user_uuid:
             await update.message.reply_text("Пожалуйста, зарегистрируйтесь перед удалением записей.")
             return ConversationHandler.END
 
         selected_option = update.message.text
-        if "Запись" not in selected_option:
+        if selected_option == "Отмена":
+            return await self.cancel(update, context)
+
+        record_match = RECORD_OPTION_RE.match(selected_option)
+        if not record_match:
             await update.message.reply_text("Пожалуйста, выберите корректную запись для удаления.")
             return await self.prompt_appointment_choosing(update, context)
         
-        appointment_index = int(selected_option.split("#")[1].strip()) - 1
-        appointments = await BackendApiClient().get_appointments_by_user_uuid(user_uuid)
+        appointment_index = int(record_match.group(1)) - 1
+        appointments = context.user_data.get("cached_appointments")
+        if not appointments or time.monotonic() - context.user_data.get("cached_appointments_at", 0) > APPOINTMENTS_CACHE_TTL:
+            appointments = await context.application.bot_data["api"].get_appointments_by_user_uuid(user_uuid)
         if not appointments:
             await update.message.reply_text("У вас нет записей на прием для удаления.")
             return ConversationHandler.END
 
-        if selected_option == "Отмена":
-            return await self.cancel(update, context)
-
         if appointment_index < 0 or appointment_index >= len(appointments):
             await update.message.reply_text("Некорректный выбор записи. Пожалуйста, попробуйте снова.")
             return await self.prompt_appointment_choosing(update, context)
@@ -156,23 +132,22 @@ class DeleteHandler:
             int: The next step in the conversation.
         """
         selected_appointment = context.user_data['selected_appointment']
-        doctor_card = await BackendApiClient().get_doctor_card(selected_appointment.get("doctorId"))
-        clinic_card = await BackendApiClient().get_clinic_card(doctor_card.get("clinicId"))
+        api = context.application.bot_data["api"]
+        doctor_id = selected_appointment.get("doctorId")
+        doctor_card = context.user_data.get("doctor_cards_by_id", {}).get(doctor_id) or await api.get_doctor_card(doctor_id)
+        clinic_id = doctor_card.get("clinicId")
+        clinic_card = context.user_data.get("clinic_cards_by_id", {}).get(clinic_id) or await api.get_clinic_card(clinic_id)
         appointment_time_str = selected_appointment.get("appointmentTime")
-        dt_object = datetime.strftime(datetime.fromisoformat(appointment_time_str), "%d.%m в %H:%M")
+        dt_object = format_appointment_time(appointment_time_str, " в ")
 
         confirmation_text = (
             f"Вы уверены, что хотите удалить запись на прием?\n\n"
-            f"Врач: <b>{doctor_card.get('name').title()}</b>\n"
-            f"Клиника: <b>{clinic_card.get('name').title()}</b>\n"
+            f"Врач: <b>{doctor_card.get('name')}</b>\n"
+            f"Клиника: <b>{clinic_card.get('name')}</b>\n"
             f"Дата и время: <b>{dt_object}</b>\n"
         )
         
-        keyboard = ReplyKeyboardMarkup(
-            [["Да", "Нет"]],
-            one_time_keyboard=True,
-            resize_keyboard=True
-        )
+        keyboard = YES_NO_KEYBOARD
         
         await update.effective_message.reply_text(confirmation_text, parse_mode='HTML', reply_markup=keyboard)
         return self.CONFIRMATION
@@ -187,30 +162,56 @@ class DeleteHandler:
         Returns:
             int: The next step in the conversation.
         """
-        if update.message.text == "Да":
-            selected_appointment = context.user_data['selected_appointment']
-            user_uuid = db.get_user_uuid(update.effective_user.id)
-            if not user_uuid:
-                await update.message.reply_text("Пожалуйста, зарегистрируйтесь перед удалением записей.")
-                return ConversationHandler.END
-            
-            try:
-                await BackendApiClient().delete_appointment(selected_appointment.get("appointmentId"), user_uuid)
-                await update.message.reply_text("Запись успешно удалена.")
-            except Exception as e:
-                logger.error(f"Error deleting appointment: {e}")
-                await update.message.reply_text("Произошла ошибка при удалении записи. Пожалуйста, попробуйте позже.")
-            
-            return ConversationHandler.END
-        
-        elif update.message.text == "Нет":
-            await update.message.reply_text("Удаление записи отменено.")
-            context.user_data.clear()
+        answer = update.message.text
+        if answer == "Да":
+            return await self._delete_selected(update, context)
+        elif answer == "Нет":
+            return await self._decline_delete(update, context)
+        await update.message.reply_text("Пожалуйста, ответьте 'Да' или 'Нет'.")
+        return await self.prompt_delete_confirm(update, context)
+
+    async def _delete_selected(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """
+        Deletes the selected appointment after the user answered "Да".
+
+        Args:
+            update (Update): The update object containing the message.
+            context (ContextTypes.DEFAULT_TYPE): The context object for the conversation.
+        Returns:
+            int: The next step in the conversation.
+        """
+        selected_appointment = context.user_data['selected_appointment']
+        user_uuid = await context.application.bot_data["db"].get_user_uuid(update.effective_user.id)
+        if not user_uuid:
+            await update.message.reply_text("Пожалуйста, зарегистрируйтесь перед удалением записей.")
             return ConversationHandler.END
         
-        else:
-            await update.message.reply_text("Пожалуйста, ответьте 'Да' или 'Нет'.")
-            return self.prompt_delete_confirm(update, context)
+        try:
+            await context.application.bot_data["api"].delete_appointment(selected_appointment.get("appointmentId"), user_uuid)
+            await update.message.reply_text("Запись успешно удалена.")
+        except Exception as e:
+            logger.error("Error deleting appointment: %s", e)
+            await update.message.reply_text("Произошла ошибка при удалении записи. Пожалуйста, попробуйте позже.")
+        finally:
+            # Сохранённый список мог устареть, следующий диалог должен запросить записи заново
+            context.user_data.pop("cached_appointments", None)
+            context.user_data.pop("cached_appointments_at", None)
+
+        return ConversationHandler.END
+
+    async def _decline_delete(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """
+        Keeps the appointment after the user answered "Нет".
+
+        Args:
+            update (Update): The update object containing the message.
+            context (ContextTypes.DEFAULT_TYPE): The context object for the conversation.
+        Returns:
+            int: The next step in the conversation.
+        """
+        await update.message.reply_text("Удаление записи отменено.")
+        context.user_data.clear()
+        return ConversationHandler.END
 
     async def cancel(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """
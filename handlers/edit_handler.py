@@ -1,13 +1,19 @@
-import telegram
-from telegram import Update, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
+from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import ContextTypes, ConversationHandler
-from clients.backend_api_client import BackendApiClient
-from datetime import date, timedelta, datetime
-import db.mongodb_service as db
+from telegram.constants import ChatAction
+from datetime import date, datetime
 import logging
+from helpers.formatting import format_appointment_time
+from helpers.dates import next_two_weeks
+from helpers.keyboards import build_keyboard, RECORD_OPTION_RE, YES_NO_KEYBOARD
+from handlers.appointment_list import render_appointments_list, appointment_options_keyboard
+import time
 
 logger = logging.getLogger(__name__)
-db = db.Database()
+
+# Сколько секунд список записей из предыдущего шага считается актуальным
+APPOINTMENTS_CACHE_TTL = 60
+
 
 class EditHandler:
     """
@@ -19,8 +25,8 @@ class EditHandler:
 
     CHOOSE_APPOINTMENT, EDIT_APPOINTMENT_DATE, EDIT_APPOINTMENT_TIME, CONFIRMATION = range(6, 10)
 
-    async def _create_keyboard(self, options: list, items_per_row: int = 2, 
-                               add_back_button: bool = True, back_button_text: str = "Назад") -> ReplyKeyboardMarkup:
+    def _create_keyboard(self, options: list, items_per_row: int = 2, 
+                         add_back_button: bool = True, back_button_text: str = "Назад") -> ReplyKeyboardMarkup:
         """ 
         Creates a keyboard layout for the given options.
         
@@ -33,15 +39,7 @@ class EditHandler:
             ReplyKeyboardMarkup: A keyboard markup object with the specified options.
         
         """
-        buttons = [KeyboardButton(option) for option in options]
-        keyboard_layout = [buttons[i:i + items_per_row] for i in range(0, len(buttons), items_per_row)]
-        if add_back_button:
-            keyboard_layout.append([KeyboardButton(back_button_text)])
-        return ReplyKeyboardMarkup(
-            keyboard_layout,
-            one_time_keyboard=True,
-            resize_keyboard=True
-        )
+        return build_keyboard(tuple(options), items_per_row, add_back_button, back_button_text)
     async def start_appointment_editing(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """
         Starts the appointment editing process by prompting the user to choose an appointment.
@@ -63,47 +61,40 @@ class EditHandler:
         Returns:
             int: The next step in the conversation.
         """
+        # Сразу показываем, что бот работает: список собирается из нескольких запросов к бэкенду
+        context.application.create_task(
+            context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
+        )
         user_id = update.effective_user.id
-        user_uuid = db.get_user_uuid(user_id)
+        user_uuid = await context.application.bot_data["db"].get_user_uuid(user_id)
 
         if not user_uuid:
             await update.message.reply_text("Пожалуйста, зарегистрируйтесь перед редактированием записей.")
-            return
+            return ConversationHandler.END
 
         try:
-            appointments = await BackendApiClient().get_appointments_by_user_uuid(user_uuid)
+            api = context.application.bot_data["api"]
+            appointments = await api.get_appointments_by_user_uuid(user_uuid)
+            # Запоминаем список, чтобы не запрашивать его повторно на шаге выбора записи
+            context.user_data["cached_appointments"] = appointments
+            context.user_data["cached_appointments_at"] = time.monotonic()
             if not appointments:
                 await update.message.reply_text("У вас нет записей на прием для редактирования.")
-                return
-            temp_id = 1
-            response_text = "Выберете запись, которую нужно отредактировать:\n\n"
-            for appointment in appointments:
-                doctor_card = await BackendApiClient().get_doctor_card(appointment.get("doctorId"))
-                clinic_card = await BackendApiClient().get_clinic_card(doctor_card.get("clinicId"))
-                appointment_time_str = appointment.get("appointmentTime")
-                dt_object = datetime.fromisoformat(appointment_time_str)
-                formatted_time = dt_object.strftime("%d.%m %H:%M")
-                response_text += (
-                    f"Запись на прием <b>#{temp_id}:</b>\n"
-                    f"Врач: <b>{doctor_card.get('name').title()}</b>\n"
-                    f"Номер телефона: <b>{doctor_card.get('phoneNumber')}</b>\n"
-                    f"Специализация: <b>{doctor_card.get('speciality').title()}</b>\n"
-                    f"Клиника: <b>{clinic_card.get('name').title()}</b>\n"
-                    f"Адрес: <b>{clinic_card.get('location').title()}</b>\n"
-                    f"Телефон клиники: <b>{clinic_card.get('phone')}</b>\n"
-                    f"Дата и время приема: <b>{formatted_time}</b>\n"
-                    f"\n"
-                )
-                temp_id += 1            
+                return ConversationHandler.END
+            response_text, doctor_cards, clinic_cards = await render_appointments_list(
+                api, appointments, "Выберете запись, которую нужно отредактировать:"
+            )
+            # Карточки понадобятся на шаге подтверждения, запоминаем их, чтобы не запрашивать снова
+            context.user_data["doctor_cards_by_id"] = doctor_cards
+            context.user_data["clinic_cards_by_id"] = clinic_cards
             await update.message.reply_text(response_text, parse_mode='HTML')
-            options = [f"Запись #{i + 1}" for i in range(len(appointments))]
-            keyboard = await self._create_keyboard(options, items_per_row=2, add_back_button=True, back_button_text="Отмена")
-            await update.message.reply_text("Выберите запись для редактирования:", reply_markup=keyboard)
+            await update.message.reply_text("Выберите запись для редактирования:", reply_markup=appointment_options_keyboard(len(appointments)))
             return self.CHOOSE_APPOINTMENT
 
         except Exception as e:
-            logger.error(f"Error fetching appointments: {e}")
+            logger.error("Error fetching appointments: %s", e)
             await update.message.reply_text("Произошла ошибка при получении записей. Пожалуйста, попробуйте позже.")
+            return ConversationHandler.END
     
     async def choose_appointment(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """
@@ -116,26 +107,29 @@ class EditHandler:
             int: The next step in the conversation.
         """
         user_id = update.effective_user.id
-        user_uuid = db.get_user_uuid(user_id)
+        user_uuid = await context.application.bot_data["db"].get_user_uuid(user_id)
 
         if not user_uuid:
             await update.message.reply_text("Пожалуйста, зарегистрируйтесь перед редактированием записей.")
             return ConversationHandler.END
 
         selected_option = update.message.text
-        if "Запись" not in selected_option:
+        if selected_option == "Отмена":
+            return await self.cancel(update, context)
+
+        record_match = RECORD_OPTION_RE.match(selected_option)
+        if not record_match:
             await update.message.reply_text("Пожалуйста, выберите корректную запись для редактирования.")
             return await self.prompt_appointment_choosing(update, context)
         
-        appointment_index = int(selected_option.split("#")[1].strip()) - 1
-        appointments = await BackendApiClient().get_appointments_by_user_uuid(user_uuid)
+        appointment_index = int(record_match.group(1)) - 1
+        appointments = context.user_data.get("cached_appointments")
+        if not appointments or time.monotonic() - context.user_data.get("cached_appointments_at", 0) > APPOINTMENTS_CACHE_TTL:
+            appointments = await context.application.bot_data["api"].get_appointments_by_user_uuid(user_uuid)
         if not appointments:
             await update.message.reply_text("У вас нет записей на прием для редактирования.")
             return ConversationHandler.END
 
-        if selected_option == "Отмена":
-            return await self.cancel(update, context)
-
         if appointment_index < 0 or appointment_index >= len(appointments):
             await update.message.reply_text("Некорректный выбор записи. Пожалуйста, попробуйте снова.")
             return await self.prompt_appointment_choosing(update, context)
@@ -155,12 +149,8 @@ class EditHandler:
         Returns:
             int: The next step in the conversation.
         """
-        start_date_val = date.today()
-        dates_next_two_weeks = []
-        for i in range(14):
-            next_date = start_date_val + timedelta(days=i)
-            dates_next_two_weeks.append(next_date.strftime("%Y-%m-%d"))
-        keyboard = await self._create_keyboard(dates_next_two_weeks, items_per_row=3, back_button_text="Назад (к выбору записи)")
+        dates_next_two_weeks = next_two_weeks(date.today().toordinal())
+        keyboard = self._create_keyboard(dates_next_two_weeks, items_per_row=3, back_button_text="Назад (к выбору записи)")
         await update.effective_message.reply_text("Выберите новую дату приема:", reply_markup=keyboard)
         return self.EDIT_APPOINTMENT_DATE
                 
@@ -193,11 +183,11 @@ class EditHandler:
         Returns:
             int: The next step in the conversation.
         """
-        times = await BackendApiClient().get_doctor_working_hours(
+        times = await context.application.bot_data["api"].get_doctor_working_hours(
             doctor_id=context.user_data['selected_appointment'].get("doctorId"),
             date=context.user_data['edit_appointment_data'].get('new_date')
         )
-        keyboard = await self._create_keyboard(times, items_per_row=3, back_button_text="Назад (к выбору даты)")
+        keyboard = self._create_keyboard(times, items_per_row=3, back_button_text="Назад (к выбору даты)")
         await update.effective_message.reply_text("Выберите новое время приема:", reply_markup=keyboard)
         return self.EDIT_APPOINTMENT_TIME
     
@@ -232,25 +222,24 @@ class EditHandler:
         selected_appointment = context.user_data['selected_appointment']
         new_date = context.user_data['edit_appointment_data'].get('new_date')
         new_time = context.user_data['edit_appointment_data'].get('new_time')
-        doctor_card = await BackendApiClient().get_doctor_card(selected_appointment.get("doctorId"))
-        clinic_card = await BackendApiClient().get_clinic_card(doctor_card.get("clinicId"))
+        api = context.application.bot_data["api"]
+        doctor_id = selected_appointment.get("doctorId")
+        doctor_card = context.user_data.get("doctor_cards_by_id", {}).get(doctor_id) or await api.get_doctor_card(doctor_id)
+        clinic_id = doctor_card.get("clinicId")
+        clinic_card = context.user_data.get("clinic_cards_by_id", {}).get(clinic_id) or await api.get_clinic_card(clinic_id)
         appointment_time_str = selected_appointment.get("appointmentTime")
-        dt_object = datetime.strftime(datetime.fromisoformat(appointment_time_str), "%d.%m в %H:%M")
+        dt_object = format_appointment_time(appointment_time_str, " в ")
 
         confirmation_text = (
             f"Вы уверены, что хотите изменить запись на прием?\n\n"
-            f"Врач: <b>{doctor_card.get('name').title()}</b>\n"
-            f"Клиника: <b>{clinic_card.get('name').title()}</b>\n"
+            f"Врач: <b>{doctor_card.get('name')}</b>\n"
+            f"Клиника: <b>{clinic_card.get('name')}</b>\n"
             f"Старая дата и время: <b>{dt_object}</b>\n"
             f"Новая дата: <b>{new_date}</b>\n"
             f"Новое время: <b>{new_time}</b>\n"
         )
         
-        keyboard = ReplyKeyboardMarkup(
-            [["Да", "Нет"]],
-            one_time_keyboard=True,
-            resize_keyboard=True
-        )
+        keyboard = YES_NO_KEYBOARD
         
         await update.effective_message.reply_text(confirmation_text, parse_mode='HTML', reply_markup=keyboard)
         return self.CONFIRMATION
@@ -268,14 +257,14 @@ class EditHandler:
         """
         if update.message.text == "Да":
             user_id = update.effective_user.id
-            user_uuid = db.get_user_uuid(user_id)
+            user_uuid = await context.application.bot_data["db"].get_user_uuid(user_id)
 
             dt_object = None
             try:
                 date_obj = datetime.strptime(context.user_data['edit_appointment_data']['new_date'], "%Y-%m-%d").date()
                 time_obj = datetime.strptime(context.user_data['edit_appointment_data']['new_time'], "%H:%M").time()
                 dt_object_combined = datetime.combine(date_obj, time_obj)
-                logger.info(f"Selected date and time: {dt_object_combined}")
+                logger.info("Selected date and time: %s", dt_object_combined)
                 if dt_object_combined < datetime.now():
                     await update.effective_message.reply_text(
                         "Выбранная дата и время уже прошли. Пожалуйста, выберите другую дату и время."
@@ -285,7 +274,7 @@ class EditHandler:
                     return await self.prompt_edit_appointment_date(update, context)                
                 dt_object = dt_object_combined.isoformat()
             except ValueError as e:
-                logger.error(f"Error parsing date or time: {e}")
+                logger.error("Error parsing date or time: %s", e)
                 await update.message.reply_text("Некорректный формат даты или времени. Пожалуйста, попробуйте снова.")
                 context.user_data['edit_appointment_data'].pop('new_date', None)
                 context.user_data['edit_appointment_data'].pop('new_time', None)
@@ -305,7 +294,7 @@ class EditHandler:
             selected_appointment = context.user_data['selected_appointment']
 
             
-            await BackendApiClient().put_appointment(
+            await context.application.bot_data["api"].put_appointment(
                 appointment_id=selected_appointment.get("appointmentId"),
                 data=request_body
             )
@@ -1,13 +1,11 @@
-import telegram
-from telegram import Update, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
-from telegram.ext import ContextTypes, ConversationHandler
-from clients.backend_api_client import BackendApiClient
-from datetime import date, timedelta, datetime
-import db.mongodb_service as db
+from telegram import Update
+from telegram.ext import ContextTypes
+from telegram.constants import ChatAction
 import logging
+from handlers.appointment_list import render_appointments_list
 
 logger = logging.getLogger(__name__)
-db = db.Database()
+
 
 class ViewHandler:
     """
@@ -19,38 +17,25 @@ class ViewHandler:
 
 
     async def handle(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        # Сразу показываем, что бот работает: список собирается из нескольких запросов к бэкенду
+        context.application.create_task(
+            context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
+        )
         user_id = update.effective_user.id
-        user_uuid = db.get_user_uuid(user_id)
+        user_uuid = await context.application.bot_data["db"].get_user_uuid(user_id)
 
         if not user_uuid:
             await update.message.reply_text("Пожалуйста, зарегистрируйтесь перед просмотром записей.")
             return
 
         try:
-            appointments = await BackendApiClient().get_appointments_by_user_uuid(user_uuid)
-            temp_id = 1
-            response_text = "Ваши записи на прием:\n\n"
-            for appointment in appointments:
-                doctor_card = await BackendApiClient().get_doctor_card(appointment.get("doctorId"))
-                clinic_card = await BackendApiClient().get_clinic_card(doctor_card.get("clinicId"))
-                appointment_time_str = appointment.get("appointmentTime")
-                dt_object = datetime.fromisoformat(appointment_time_str)
-                formatted_time = dt_object.strftime("%d.%m %H:%M")
-                response_text += (
-                    f"Запись на прием <b>#{temp_id}:</b>\n"
-                    f"Врач: <b>{doctor_card.get('name')}</b>\n"
-                    f"Номер телефона: <b>{doctor_card.get('phoneNumber')}</b>\n"
-                    f"Специализация: <b>{doctor_card.get('speciality')}</b>\n"
-                    f"Клиника: <b>{clinic_card.get('name')}</b>\n"
-                    f"Адрес: <b>{clinic_card.get('location')}</b>\n"
-                    f"Телефон клиники: <b>{clinic_card.get('phone')}</b>\n"
-                    f"Дата и время приема: <b>{formatted_time}</b>\n"
-                    f"\n"
-                )
-                temp_id += 1
-            await update.message.reply_text(response_text, parse_mode='HTML')
+            api = context.application.bot_data["api"]
+            appointments = await api.get_appointments_by_user_uuid(user_uuid)
             if not appointments:
                 await update.message.reply_text("У вас нет записей на прием.")
+                return
+            response_text, _, _ = await render_appointments_list(api, appointments, "Ваши записи на прием:")
+            await update.message.reply_text(response_text, parse_mode='HTML')
         except Exception as e:
-            logger.error(f"Error fetching appointments: {e}")
+            logger.error("Error fetching appointments: %s", e)
             await update.message.reply_text("Произошла ошибка при получении записей. Пожалуйста, попробуйте позже.")
\ No newline at end of file
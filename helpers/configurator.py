@@ -1,13 +1,15 @@
-import os.path
 import configparser
+from functools import lru_cache
 
 class Config:
     def __init__(self, config_file='config.ini'):
         self.config_file = config_file
-        self.config = configparser.ConfigParser()
-        if os.path.exists(self.config_file):
-            self.config.read(self.config_file)
-        else:
+        # Интерполяция не используется, а токены могут содержать символ %
+        self.config = configparser.ConfigParser(interpolation=None)
+        try:
+            with open(self.config_file) as configfile:
+                self.config.read_file(configfile)
+        except FileNotFoundError:
             self._create_default_config()
 
     def _create_default_config(self):
@@ -21,12 +23,23 @@ class Config:
         with open(self.config_file, 'w') as configfile:
             self.config.write(configfile)
 
-    def get(self, section, option):
-        return self.config.get(section, option)
+    def get(self, section, option, **kwargs):
+        return self.config.get(section, option, **kwargs)
 
     def set(self, section, option, value):
+        # Значение не изменилось, перезаписывать файл незачем
+        if self.config.get(section, option, fallback=None) == value:
+            return
         if not self.config.has_section(section):
             self.config.add_section(section)
         self.config.set(section, option, value)
         with open(self.config_file, 'w') as configfile:
-            self.config.write(configfile)
\ No newline at end of file
+            self.config.write(configfile)
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """
+    Returns the process-wide Config instance, reading config.ini only once.
+    """
+    return Config()
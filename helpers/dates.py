@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+from functools import lru_cache
+
+# На сколько дней вперёд, начиная с сегодняшнего, можно записаться на прием
+BOOKING_WINDOW_DAYS = 14
+
+
+@lru_cache(maxsize=2)
+def next_two_weeks(today_ordinal: int) -> tuple:
+    """
+    Returns the dates of the next two weeks starting from the given day.
+    Keyed by the day ordinal, so the list is rebuilt only when the day changes.
+
+    Args:
+        today_ordinal (int): The proleptic Gregorian ordinal of today's date.
+    Returns:
+        tuple: The dates formatted as YYYY-MM-DD.
+    """
+    start_date_val = date.fromordinal(today_ordinal)
+    return tuple((start_date_val + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(BOOKING_WINDOW_DAYS))
+
+
+def is_bookable_date(day: date) -> bool:
+    """
+    Tells whether an appointment can be booked on the given day, i.e. it is one of next_two_weeks().
+
+    Args:
+        day (date): The appointment date.
+    Returns:
+        bool: True if the day is within the booking window.
+    """
+    today = date.today()
+    return today <= day < today + timedelta(days=BOOKING_WINDOW_DAYS)
@@ -0,0 +1,18 @@
+from datetime import datetime
+from functools import lru_cache
+
+
+@lru_cache(maxsize=512)
+def format_appointment_time(iso_str: str, separator: str = " ") -> str:
+    """
+    Formats an ISO appointment time from the backend as "DD.MM HH:MM".
+    The same appointments are shown again on every listing and confirmation, so results are memoized.
+
+    Args:
+        iso_str (str): The appointment time in ISO format.
+        separator (str): Text between the date and the time, e.g. " в ".
+    Returns:
+        str: The formatted appointment time.
+    """
+    dt = datetime.fromisoformat(iso_str)
+    return f"{dt.day:02d}.{dt.month:02d}{separator}{dt.hour:02d}:{dt.minute:02d}"
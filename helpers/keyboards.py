@@ -0,0 +1,34 @@
+from functools import lru_cache
+import re
+from telegram import KeyboardButton, ReplyKeyboardMarkup
+
+
+@lru_cache(maxsize=128)
+def build_keyboard(options: tuple, items_per_row: int, add_back_button: bool, back_button_text: str) -> ReplyKeyboardMarkup:
+    """
+    Builds a keyboard layout for the given options.
+    Markups are immutable, so identical layouts are built once and shared between users.
+
+    Args:
+        options (tuple): Options to create buttons for.
+        items_per_row (int): Number of buttons per row.
+        add_back_button (bool): Whether to add a "Back" button.
+        back_button_text (str): Text for the "Back" button.
+    Returns:
+        ReplyKeyboardMarkup: A keyboard markup object with the specified options.
+    """
+    buttons = [KeyboardButton(option) for option in options]
+    keyboard_layout = [buttons[i:i + items_per_row] for i in range(0, len(buttons), items_per_row)]
+    if add_back_button:
+        keyboard_layout.append([KeyboardButton(back_button_text)])
+    return ReplyKeyboardMarkup(
+        keyboard_layout,
+        one_time_keyboard=True,
+        resize_keyboard=True
+    )
+
+
+YES_NO_KEYBOARD = build_keyboard(("Да", "Нет"), 2, False, "")
+
+# Кнопки выбора записи имеют вид "Запись #N"
+RECORD_OPTION_RE = re.compile(r"^Запись #(\d+)$")
@@ -1,82 +1,164 @@
+from cachetools import TTLCache
 from google import genai
-from google.genai import types
-from helpers.configurator import Config
+from google.genai import errors, types
+from helpers.configurator import get_config
 from datetime import datetime
-import json
-import re
+import orjson
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+
+def _is_retryable_error(exc: BaseException) -> bool:
+    """
+    Tells whether Gemini rejected a request because of rate limits or a transient server error.
+    """
+    return isinstance(exc, errors.APIError) and (exc.code == 429 or exc.code >= 500)
+
+
+# Повторяем запросы, упёршиеся в лимиты или временные ошибки сервера, с экспоненциальной паузой и джиттером
+_retry_on_overload = retry(
+    retry=retry_if_exception(_is_retryable_error),
+    wait=wait_random_exponential(multiplier=0.25, max=4),
+    stop=stop_after_attempt(4),
+    reraise=True
+)
+
+# Схема ответа модели: декодер Gemini гарантирует валидный JSON этой формы
+_RESPONSE_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "intent": types.Schema(
+            type=types.Type.STRING,
+            enum=[
+                "book_appointment",
+                "reschedule_appointment",
+                "cancel_appointment",
+                "view_appointments",
+                "unknown",
+            ],
+        ),
+        "data": types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "doctor": types.Schema(type=types.Type.STRING),
+                "specialization": types.Schema(type=types.Type.STRING),
+                "clinic": types.Schema(type=types.Type.STRING),
+                "date": types.Schema(type=types.Type.STRING),
+                "time": types.Schema(type=types.Type.STRING),
+            },
+        ),
+        "reason": types.Schema(type=types.Type.STRING),
+    },
+    required=["intent"],
+)
+
+_SYSTEM_INSTRUCTION = """
+    Ты работаешь в роле чат-бота ассистента регистратуры клиники. 
+    Твоя задача, на основе предоставленной информации понять интент пользователя, 
+    хочет ли он записаться на прием к врачу, перенести существующий прием, удалить существующий прием,
+    узнать информацию о враче или клинике, или задать другой вопрос. в качечстве ответа дай только JSON в формате:
+    {
+        "intent": "<интент>",
+        "data": # данные, которые ты можешь извлечь из текста пользователя если они есть
+        {
+            "doctor": "Имя врача", # при наличии
+            "specialization": "Специализация врача", # при наличии
+            "clinic": "Название клиники", # при наличии
+            "date": "Дата приема", # при наличии (важно в формате YYYY-MM-DD, если время указано без даты не указана, то считай завтрашнюю дату)
+            "time": "Время приема" # при наличии (важно в формате HH:MM)
+        }
+    }
+    <интент> может быть одним из следующих: "book_appointment", "reschedule_appointment", "cancel_appointment", 
+    "view_appointments".
+    Важно, чтобы ты отлавливал очевидные ошибки в запросах пользователя, например, если он пытается записаться на прием к врачу на уже прошедшую дату,
+    или пытается перенести прием на дату, которая уже прошла (для этого вместе с сообщением пользователя передается текущая дата и время, важно сверяться с ними).
+    Если не можешь понять интент или он не соответствует, дай ответ в формате:
+    {
+        "intent": "unknown",
+        "reason": "Причина непонимания запроса"
+    }
+    """
+
+_GEN_CONFIG = types.GenerateContentConfig(
+    system_instruction=_SYSTEM_INSTRUCTION,
+    response_mime_type="application/json",
+    response_schema=_RESPONSE_SCHEMA,
+    # Детерминированный ответ лучше попадает в кэш, а один кандидат не тратит лишних токенов
+    temperature=0,
+    candidate_count=1,
+)
+
 
 class GoogleService:
     def __init__(self):
-        self.token = Config().get("GOOGLE", "token")
-        self.default_model = Config().get("GOOGLE", "model")
+        self.token = get_config().get("GOOGLE", "token")
+        self.default_model = get_config().get("GOOGLE", "model")
+        # Клиент одинаков для всех запросов, создаём его один раз
+        self.client = genai.Client(api_key=self.token)
+        # Разобранные интенты повторяющихся сообщений, ключ включает текущую минуту
+        self._cache = TTLCache(maxsize=1024, ttl=60)
 
-    async def generate_json_text(self, prompt: str, max_tokens: int = 500) -> str:
-        client = genai.Client(api_key=Config().get("GOOGLE", "token"))
-        
-        response = client.models.generate_content(
-            model=self.default_model,
-            config=types.GenerateContentConfig(
-                system_instruction=
-                """
-                Ты работаешь в роле чат-бота ассистента регистратуры клиники. 
-                Твоя задача, на основе предоставленной информации понять интент пользователя, 
-                хочет ли он записаться на прием к врачу, перенести существующий прием, удалить существующий прием,
-                узнать информацию о враче или клинике, или задать другой вопрос. в качечстве ответа дай только JSON в формате:
-                {
-                    "intent": "<интент>",
-                    "data": # данные, которые ты можешь извлечь из текста пользователя если они есть
-                    {
-                        "doctor": "Имя врача", # при наличии
-                        "speialization": "Специализация врача", # при наличии
-                        "clinic": "Название клиники", # при наличии
-                        "date": "Дата приема", # при наличии (важно в формате YYYY-MM-DD, если время указано без даты не указана, то считай завтрашнюю дату)
-                        "time": "Время приема" # при наличии (важно в формате HH:MM)
-                    }
-                }
-                <интент> может быть одним из следующих: "book_appointment", "reschedule_appointment", "cancel_appointment", 
-                "view_appointments".
-                Важно, чтобы ты отлавливал очевидные ошибки в запросах пользователя, например, если он пытается записаться на прием к врачу на уже прошедшую дату,
-                или пытается перенести прием на дату, которая уже прошла (для этого вместе с сообщением пользователя передается текущая дата и время, важно сверяться с ними).
-                Если не можешь понять интент или он не соответствует, дай ответ в формате:
-                {
-                    "intent": "unknown",
-                    "reason": "Причина непонимания запроса"
-                }
-                """
-                
-            ),
-            contents = f"Запрос пользователя: ({prompt}), Сегодня - {datetime.now().strftime('%Y-%m-%d')}, время - {datetime.now().strftime('%H:%M')}"
-        )
-        json_string = response.text
-        try:
-            parsed_json = json.loads(json_string)
-        except json.JSONDecodeError:
-
-            error_reason = "Модель вернула невалидный JSON."
-            raw_text_for_error = json_string if 'json_string' in locals() else "No text received from model"
-
-            match = re.search(r"```json\s*([\s\S]*?)\s*```", raw_text_for_error, re.DOTALL)
-            if match:
-                extracted_json_string = match.group(1).strip()
-                try:
-                    parsed_json = json.loads(extracted_json_string)
-                    return parsed_json # Успех с извлечением
-                except json.JSONDecodeError:
-                    error_reason = "Модель вернула невалидный JSON даже после извлечения из блока кода."
-                    raw_text_for_error = extracted_json_string
+    async def generate_json_text(self, prompt: str, max_tokens: int = 500) -> dict:
+        """
+        Determines the intent of a user message.
 
-            return {
-                "intent": "unknown",
-                "reason": error_reason,
-                "raw_output": raw_text_for_error
-            }
+        Repeated messages within the same minute are answered from a cache.
+
+        Args:
+            prompt (str): The user's message text.
+            max_tokens (int): Output token limit for the model's answer.
+
+        Returns:
+            dict: The parsed intent with optional "data" or "reason" fields.
+        """
+        # Один момент времени для даты и времени, чтобы они не разъехались на границе минуты
+        now = datetime.now()
+        key = (prompt, f"{now:%Y-%m-%d %H:%M}")
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            json_string = await self._generate(prompt, now, max_tokens)
         except Exception as e:
-            # Обработка других ошибок API или неожиданных проблем
-            # Например, google.api_core.exceptions.PermissionDenied (403) если ключ неверный
-            # google.api_core.exceptions.ResourceExhausted (429) если превышены квоты
+            # Неповторяемые ошибки API (например, 403 при неверном ключе), исчерпанные повторы
+            # при 429/5xx или неожиданные проблемы
             return {
                 "intent": "unknown",
                 "reason": f"Произошла ошибка API или внутренняя ошибка: {type(e).__name__} - {str(e)}",
                 "raw_output": None
             }
-        return parsed_json
\ No newline at end of file
+
+        try:
+            parsed_json = orjson.loads(json_string)
+        except (orjson.JSONDecodeError, TypeError):
+            parsed_json = None
+        if not isinstance(parsed_json, dict):
+            # Ошибки разбора не кэшируем, чтобы повтор сообщения ушёл в модель заново
+            return {
+                "intent": "unknown",
+                "reason": "Модель вернула невалидный JSON.",
+                "raw_output": json_string
+            }
+
+        self._cache[key] = parsed_json
+        return parsed_json
+
+    @_retry_on_overload
+    async def _generate(self, prompt: str, now: datetime, max_tokens: int) -> str:
+        """
+        Sends a single user message to the model.
+
+        Args:
+            prompt (str): The user's message text.
+            now (datetime): The current date and time passed to the model.
+            max_tokens (int): Output token limit for the model's answer.
+
+        Returns:
+            str: The raw JSON text of the model's answer.
+        """
+        response = await self.client.aio.models.generate_content(
+            model=self.default_model,
+            config=_GEN_CONFIG.model_copy(update={"max_output_tokens": max_tokens}),
+            contents=f"Запрос пользователя: ({prompt}), Сегодня - {now:%Y-%m-%d}, время - {now:%H:%M}"
+        )
+        return response.text
@@ -1,4 +1,5 @@
 from bot.telegram_bot_initializer import TelegramBotInitializer
+import asyncio
 import logging
 
 
@@ -6,4 +7,4 @@ if __name__ == "__main__":
     # Initialize the Telegram bot with the token
     logging.basicConfig(level=logging.INFO)
 
-    bot_initializer = TelegramBotInitializer()
\ No newline at end of file
+    asyncio.run(TelegramBotInitializer().run())